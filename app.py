@@ -1,296 +1,416 @@
 # --- Importy Wymaganych Bibliotek ---
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, g, abort, send_file, url_for
 from dotenv import load_dotenv
 from openai import OpenAI
-# Importujemy konkretne błędy OpenAI do obsługi ponawiania
-from openai import RateLimitError, APIError
 import os
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_cors import CORS
 import logging
-# Wymagane do dodania opóźnienia w mechanizmie retry
+import json
+import hmac
+import secrets
+import re
 import time
+# Odporna warstwa wywołań OpenAI: retry z jitterem, Retry-After, deadline, circuit breaker
+from upstream import Upstream, UpstreamBusy, UpstreamRateLimited, UpstreamUnavailable
+# Magazyn sesji rozmów (osobna historia dla każdego odwiedzającego)
+from sessions import create_session_store
+# Budżet tokenów kontekstu i podsumowanie starszych tur
+from context import build_context, format_context_stats
+# Modułowy system prompt: stały prefiks + scenariusze dobierane do rozmowy
+from prompt import PROMPT_VERSION, build_system_prompt, detect_scenarios, prompt_tokens
+# Cache odpowiedzi dla pierwszych wiadomości / pytań typu FAQ
+from cache import create_response_cache
+# Trwała kolejka leadów i wysyłka w tle do endpointu WordPress
+from leads import create_lead_pipeline
+# Współdzielone limity (SQLite): backend flask-limiter, budżety tokenów, limit TPM dla OpenAI
+from ratelimit import create_token_limits
+# Zbudowane paczki widżetu (python assets.py): hash w nazwie, wersje gzip/brotli
+from assets import MIMETYPES, LOADER_NAME, load_manifest, asset_index, choose_encoding
+# Odpowiedzi skryptowe (Zasady 11-13) na podstawie stanu rozmowy - bez zapytania do OpenAI
+from fastpath import scripted_reply
+# Metryki Prometheusa (histogramy czasów, liczniki tokenów)
+from metrics import (registry, record_usage, REQUEST_DURATION, UPSTREAM_DURATION, TIME_TO_FIRST_TOKEN,
+                     SERIALIZATION_DURATION, RESPONSES, RATE_LIMITED, FASTPATH_REPLIES)
+# Logowanie JSON przez kolejkę (zapis na dysk poza wątkiem zapytania) z rotacją pliku
+from logs import setup_logging
+from datetime import datetime, timezone
+
+load_dotenv()
 
 # --- Konfiguracja Logowania ---
-# Ustawienie podstawowej konfiguracji logowania: zapis do pliku 'app.log'
-# Format logu: Czas | Poziom | Wiadomość
-logging.basicConfig(
-    filename='app.log',
-    level=logging.INFO,
-    format='%(asctime)s | %(levelname)s | %(name)s | %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
-# Użycie loggera Flask domyślnie wysyła logi do konsoli
+# Zapis do pliku 'app.log' (LOG_FILE) jako JSON: czas, poziom, wiadomość, id zapytania, sesja, czasy.
+# Zapytania tylko dokładają rekord do kolejki - plik zapisuje wątek systemowy w tle (także pod gevent).
+log_handler = setup_logging()
 logger = logging.getLogger(__name__)
 
 # --- Inicjalizacja Aplikacji i Klienta OpenAI ---
-load_dotenv()
 app = Flask(__name__)
 
 # ----------------------------------------------------------------------
 # ZABEZPIECZENIE 1: ZARZĄDZANIE DOSTĘPEM (CORS)
 ALLOWED_ORIGIN = "https://matyladesign.pl" # DOMENA WPISANA NA STAŁE
 # Poprawka: Zmieniono ALLOWED_ORIGEN na ALLOWED_ORIGIN
-CORS(app, resources={r"/chat": {"origins": [ALLOWED_ORIGIN]}})
+# Widżet wywołuje cross-origin również /chat/transcript i /chat/lead (flask-cors dopasowuje pełną ścieżkę)
+CORS(app, resources={r"/chat(/.*)?": {"origins": [ALLOWED_ORIGIN]}})
 
 # ----------------------------------------------------------------------
 # KONFIGURACJA RATE LIMITING (Ograniczenie liczby zapytań)
+# Liczniki w pliku SQLite (RATE_LIMIT_DB_PATH) są wspólne dla wszystkich workerów gunicorna
+# i przetrwają restart - limit nie mnoży się przez liczbę workerów.
+RATE_LIMIT_DB_PATH = os.getenv("RATE_LIMIT_DB_PATH", "ratelimit.db")
 limiter = Limiter(
     app=app,
     key_func=get_remote_address,
     default_limits=["15 per minute", "100 per day"], # ZMIENIONO LIMIT Z 5 NA 15
-    storage_uri="memory://"
+    storage_uri=os.getenv("RATE_LIMIT_STORAGE_URI", f"sqlite://{RATE_LIMIT_DB_PATH}")
 )
 
+# Identyfikator zapytania: z nagłówka X-Request-ID (proxy) lub nadawany przez serwer.
+# Trafia do każdej linii logu z tego zapytania i wraca w nagłówku odpowiedzi.
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{8,64}$')
+
+@app.before_request
+def assign_request_id():
+    incoming = request.headers.get('X-Request-ID', '')
+    g.request_id = incoming if REQUEST_ID_PATTERN.match(incoming) else secrets.token_hex(8)
+
+@app.after_request
+def expose_request_id(response):
+    response.headers['X-Request-ID'] = g.get('request_id', '')
+    return response
+
 # Obsługa błędu Rate Limiting (logowanie zablokowanych prób)
 @app.errorhandler(429)
 def ratelimit_handler(e):
     client_ip = get_remote_address()
     logger.warning(f"RATE LIMIT PRZEKROCZONY (429) | IP: {client_ip} | Limit: {e.description}")
+    RATE_LIMITED.inc(source="limiter")
     return jsonify({"response": "Przekroczyłeś limit zapytań. Spróbuj ponownie za chwilę."}), 429
 
 try:
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise ValueError("Klucz OPENAI_API_KEY nie został znaleziony...")
-    client = OpenAI(api_key=api_key)
+    # Ponawianie realizuje warstwa upstream.py - wyłączamy ponawianie wbudowane w SDK (max_retries=0),
+    # żeby nie mnożyć prób, i ograniczamy czas pojedynczego zapytania.
+    client = OpenAI(
+        api_key=api_key,
+        max_retries=0,
+        timeout=float(os.getenv("OPENAI_TIMEOUT_SECONDS", 60))
+    )
     logger.info("Inicjalizacja OpenAI Client - Sukces")
 except ValueError as e:
     logger.error(f"BŁĄD KONFIGURACJI KLUCZA API: {e}")
     print(f"BŁĄD KONFIGURACJI KLUCZA API: {e}")
+    client = None
+
+# ----------------------------------------------------------------------
+# SESJE ROZMÓW: każdy odwiedzający ma własną historię (LRU + TTL + limit pamięci).
+# Sesje są współdzielone między workerami gunicorna przez plik SQLite (SESSION_DB_PATH, domyślnie sessions.db).
+session_store = create_session_store()
+
+# CACHE ODPOWIEDZI: powtarzalne pierwsze wiadomości obsługiwane bez zapytania do OpenAI.
+# Klucz zawiera wersję promptu, więc każda zmiana promptu unieważnia cache.
+response_cache = create_response_cache(PROMPT_VERSION)
+
+# PRZEKAZYWANIE LEADÓW: zapis do lokalnej kolejki (LEAD_QUEUE_PATH), wysyłka w tle do LEAD_SINK_URL
+lead_queue, lead_worker = create_lead_pipeline()
+if lead_worker is not None:
+    lead_worker.start()
+
+# ----------------------------------------------------------------------
+# WYWOŁANIA OPENAI (upstream.py)
+# Pod workerem gevent (gunicorn.conf.py) jeden proces obsługuje setki rozmów naraz,
+# a oczekiwanie na OpenAI (także opóźnienia retry) nie blokuje innych zapytań.
+# Semafor ogranicza równoczesne zapytania, breaker odcina ruch w czasie awarii dostawcy.
+openai_upstream = Upstream(
+    client,
+    model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+    fallback_model=os.getenv("OPENAI_FALLBACK_MODEL") or None,
+    max_attempts=int(os.getenv("UPSTREAM_MAX_ATTEMPTS", 3)),
+    deadline=float(os.getenv("UPSTREAM_DEADLINE_SECONDS", 30)),
+    max_concurrency=int(os.getenv("UPSTREAM_MAX_CONCURRENCY", 100)),
+    queue_timeout=float(os.getenv("UPSTREAM_QUEUE_TIMEOUT", 10)),
+)
+
+# BUDŻETY TOKENÓW (ratelimit.py): koszt rozmowy per IP i per sesja oraz globalny limit tokenów
+# na minutę - nadmiarowy ruch czeka lub dostaje 503, zanim OpenAI zacznie zwracać 429.
+token_budgets, token_governor = create_token_limits()
+# Szacowana długość odpowiedzi modelu (rezerwacja w limicie TPM przed zapytaniem)
+COMPLETION_TOKEN_ESTIMATE = int(os.getenv("COMPLETION_TOKEN_ESTIMATE", 400))
+
+RATE_LIMIT_MESSAGE = "Przekroczyłeś limit zapytań. Spróbuj ponownie za chwilę."
+TOKEN_BUDGET_MESSAGE = "Osiągnięto dzienny limit rozmowy z asystentem. Skontaktuj się z nami bezpośrednio: kontakt@matyladesign.pl lub 881 622 882."
+BUSY_MESSAGE = "Serwer jest chwilowo przeciążony. Spróbuj ponownie za chwilę."
+FALLBACK_MESSAGE = "Przepraszam, wystąpił nieoczekiwany problem techniczny. (Błąd: Nieznany błąd API)"
+
+
+def upstream_error_response(error, client_ip, label=""):
+    """Mapuje błędy warstwy upstream na dotychczasowe komunikaty dla widżetu."""
+    if isinstance(error, UpstreamBusy):
+        logger.warning(f"REQUEST FAIL | IP: {client_ip} | Błąd: Limit równoczesnych zapytań do OpenAI{label}")
+        return jsonify({"error": "busy", "response": BUSY_MESSAGE}), 503
+    if isinstance(error, UpstreamRateLimited):
+        RATE_LIMITED.inc(source="upstream")
+        logger.error(f"REQUEST FAIL (429) | IP: {client_ip} | Błąd: RateLimitError po wszystkich próbach{label}")
+        return jsonify({"error": "rate_limit", "response": RATE_LIMIT_MESSAGE}), 429
+    if isinstance(error, UpstreamUnavailable):
+        logger.error(f"REQUEST FAIL | IP: {client_ip} | Błąd: OpenAI niedostępne ({error}){label}")
+        return jsonify({"error": "unavailable", "response": FALLBACK_MESSAGE}), 503
+    logger.error(f"REQUEST FAIL | IP: {client_ip} | BŁĄD OGÓLNY: {type(error).__name__} - {error}{label}")
+    return jsonify({'response': FALLBACK_MESSAGE}), 500
+
+def charge_tokens(client_ip, session, token_estimate, usage):
+    """Rozlicza rezerwację TPM i budżety faktycznym zużyciem (bez usage - według szacunku)."""
+    actual = usage.total_tokens if usage is not None else token_estimate
+    token_governor.settle(token_estimate, actual)
+    token_budgets.charge(client_ip, session.id, actual)
+
+# --- Strumieniowanie Odpowiedzi (Server-Sent Events) ---
+CONSENT_TAG = "[CONSENT]"
+
+
+class ConsentTagScanner:
+    """
+    Przyrostowe wykrywanie tagu [CONSENT] w strumieniu tokenów.
+    Tag może przyjść podzielony na kilka fragmentów, więc końcówka bufora,
+    która może być początkiem tagu, jest wstrzymywana do kolejnego fragmentu.
+    """
+
+    def __init__(self):
+        self.pending = ""
+        self.found = False
+
+    def feed(self, text):
+        """Zwraca (tekst do wysłania bez tagu, czy tag został właśnie wykryty)."""
+        buffer = self.pending + text
+        detected = False
+        if CONSENT_TAG in buffer:
+            buffer = buffer.replace(CONSENT_TAG, "")
+            detected = not self.found
+            self.found = True
+        # Wstrzymaj końcówkę, która może być początkiem tagu (np. "[CONS")
+        hold = 0
+        for size in range(min(len(CONSENT_TAG) - 1, len(buffer)), 0, -1):
+            if CONSENT_TAG.startswith(buffer[-size:]):
+                hold = size
+                break
+        self.pending = buffer[len(buffer) - hold:] if hold else ""
+        return buffer[:len(buffer) - hold], detected
+
+    def flush(self):
+        text, self.pending = self.pending, ""
+        return text
+
+
+def elapsed_ms(since):
+    """Czas od 'since' (time.perf_counter) w milisekundach - pole 'timings' w logu."""
+    return round((time.perf_counter() - since) * 1000, 1)
+
+
+def sse_event(payload, event=None):
+    """Formatuje pojedyncze zdarzenie SSE z danymi JSON."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+def commit_turn(session, user_entry, ai_response):
+    """
+    Zapisuje zakończoną turę (wiadomość + odpowiedź) w historii sesji.
+    Gdy model wyświetla formularz zgody, sesja dostaje token do pobrania transkryptu.
+    """
+    session.history.extend([user_entry, {"role": "assistant", "content": ai_response}])
+    if CONSENT_TAG in ai_response and not session.transcript_token:
+        session.transcript_token = secrets.token_urlsafe(32)
+    session_store.save(session)
+
+
+def chat_payload(session, ai_response, source="model"):
+    """
+    Odpowiedź /chat: tylko nowa wiadomość AI i numer tury (rewizja sesji) - bez historii
+    i system promptu. Transkrypt jest dostępny osobno przez /chat/transcript.
+    'source' mówi, skąd pochodzi odpowiedź: model, cache lub fastpath (odpowiedź skryptowa).
+    """
+    payload = {
+        'response': ai_response,
+        'session_id': session.id,
+        'turn': session.revision,
+        'source': source
+    }
+    if session.transcript_token:
+        payload['transcript_token'] = session.transcript_token
+    return payload
+
+
+def instant_response(session, user_entry, ai_response, stream, started, source):
+    """
+    Odpowiedź gotowa bez zapytania do OpenAI (trafienie w cache lub odpowiedź skryptowa).
+    Zwracana w tym samym formacie co odpowiedź modelu: JSON lub jednorazowy strumień SSE.
+    """
+    commit_turn(session, user_entry, ai_response)
+    mode = "stream" if stream else "json"
+    if not stream:
+        serialize_started = time.perf_counter()
+        response = jsonify(chat_payload(session, ai_response, source))
+        SERIALIZATION_DURATION.observe(time.perf_counter() - serialize_started, mode=mode)
+        REQUEST_DURATION.observe(time.perf_counter() - started, mode=mode)
+        return response
+
+    def generate():
+        visible = ai_response.replace(CONSENT_TAG, "")
+        yield sse_event({'session_id': session.id}, event='session')
+        if CONSENT_TAG in ai_response:
+            yield sse_event({'consent': True}, event='consent')
+        yield sse_event({'delta': visible})
+        yield sse_event(dict(chat_payload(session, ai_response, source), consent=CONSENT_TAG in ai_response), event='done')
+        TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - started, mode=mode)
+        REQUEST_DURATION.observe(time.perf_counter() - started, mode=mode)
+
+    return Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+
+def stream_chat_response(session, user_entry, conversation_history, context_stats, client_ip, started, token_estimate):
+    """
+    Wariant /chat ze strumieniowaniem (stream=True do OpenAI, SSE do widżetu).
+    Do historii sesji trafia wyłącznie kompletna odpowiedź - przerwany strumień niczego nie zapisuje.
+    """
+    # Ponawiamy tylko otwarcie strumienia - po pierwszym tokenie nie można już powtórzyć odpowiedzi.
+    # Miejsce w limicie równoczesnych zapytań jest zajęte do końca strumienia (zwalnia je release_upstream).
+    upstream_started = time.perf_counter()
+    try:
+        upstream, release_upstream, attempt, model = openai_upstream.open_stream(
+            conversation_history, log_context=f" | IP: {client_ip}"
+        )
+    except Exception as e:
+        token_governor.settle(token_estimate, 0)
+        RESPONSES.inc(source="model", outcome="error")
+        REQUEST_DURATION.observe(time.perf_counter() - started, mode="stream")
+        return upstream_error_response(e, client_ip, " | Stream")
+
+    # Generator działa już poza kontekstem zapytania Flask - pola logu przekazujemy jawnie
+    log_extra = {'request_id': g.get('request_id'), 'session': session.id[:8]}
+
+    def generate():
+        scanner = ConsentTagScanner()
+        parts = []
+        usage = None
+        charged = False
+        serialize_time = 0.0
+        first_token_ms = None
+
+        def event(payload, name=None):
+            nonlocal serialize_time
+            serialize_started = time.perf_counter()
+            encoded = sse_event(payload, name)
+            serialize_time += time.perf_counter() - serialize_started
+            return encoded
 
-# PEŁNA, USTRUKTURYZOWANA INSTRUKCJA DLA MODELU AI
-SYSTEM_PROMPT = """
-Jesteś inteligentnym asystentem agencji **Matyla Design**. Jesteś częścią zespołu i mówisz w imieniu agencji. Pomagasz markom w dopasowaniu odpowiednich usług – od brandingu i strategii komunikacji, po kampanie reklamowe, strony internetowe (wyłącznie Custom Code na WordPressie) i automatyzacje AI. Znasz pełną ofertę i wartości agencji. Twoją misją jest pokazać klientowi, dlaczego Matyla Design wyróżnia się na rynku.
-
-# 🎯 CEL ROZMOWY
-1. Zrozumieć cel, potrzeby i oczekiwania klienta.
-2. Pomóc mu dobrać najlepsze rozwiązanie – **NIGDY NIE PADAJEMY CEN**.
-3. Prowadzić klienta do kontaktu z zespołem.
-
-# 💬 STYL I TON
-Mów po polsku. Ton: profesjonalny, konkretny, spokojny, z charakterem, ale ludzki i przyjazny. Brzmij jak doświadczony strateg i esteta – pewny siebie, ale nie sztywny. Używaj krótkich, celnych zdań. Stosuj delikatne emotikony (np. 🙂, 💬, ✨, 🧠) – tylko wtedy, gdy pasują do kontekstu i nie zaburzają profesjonalnego tonu. **Jesteś bardzo elastyczny w rozumieniu intencji klienta, nawet jeśli popełnia błędy w pisowni, używa slangów lub pomija polskie znaki.** Nie zmuszaj klienta do poprawiania błędów. Nie używaj myślników (—).
-
-# 💡 ZASADY PROWADZENIA ROZMOWY
-1. **AKCENTOWANIE PRZEWAGI (Kluczowe):** Na początku rozmowy, **zanim przejdziesz do pytań kwalifikacyjnych**, w swojej pierwszej lub drugiej odpowiedzi (jeśli to naturalnie pasuje do kontekstu) **krótko wspomnij o naszym modelu współpracy (Agencja Hybrydowa)** lub **wyłącznym tworzeniu stron w Custom Code na WordPressie** (jako przewaga nad freelancerami/szablonami), aby od razu budować zaufanie i różnicować nas od konkurencji.
-2. **Start i Progres (WZMOCNIONA ZASADA):** Jeśli klient na początku rozmowy pyta o konkretną usługę (np. strona internetowa, marketing, AI, branding) **lub stwierdza, że jej potrzebuje (np. "Chcę stronę WWW", "Potrzebuję landing page", "Ile kosztuje sklep")**, **natychmiast przejdź do pytań z sekcji SCENARIUSZE PRE-KWALIFIKACYJNE** dla tej usługi, traktując to jako wysokopriorytetowe zapytanie. Prowadź rozmowę tak, aby naturalnie doprowadzić klienta do kontaktu z agencją.
-3. **Złożone Projekty ("Chcę wszystko"):** Jeśli klient opisuje, że potrzebuje kompleksowej pomocy (np. "Chcę założyć nową firmę, zrobić stronę i zająć się marketingiem"), **natychmiast zaproponuj Audyt Strategiczny** jako pierwszy krok. Użyj frazy: "W tak złożonym projekcie, najlepiej zacząć od **Strategii i Audytu Marketingowego**. To nasza mapa drogowa, która zapewni, że każdy element (strona, branding, kampanie) będzie działał spójnie i celowo. Czy możemy przejść do kontaktu w celu omówienia tego audytu?" -> A następnie przejdź do [CONSENT].
-4. **Dawkowanie Pytań (WZMOCNIONE):** Niezależnie od usługi, **zadawaj maksymalnie 1-2 pytania na raz**, a następnie poczekaj na odpowiedź klienta. Prowadź dialog, a nie ankietę. **Model ma obowiązek zadawać pytania po kolei, w osobnych wiadomościach, nie wrzucać całej puli pytań jednocześnie.**
-5. **Dopasowanie Rozwiązania:** Na podstawie odpowiedzi klienta dopasuj rozwiązanie z oferty Matyla Design. Wyjaśnij, dlaczego dane rozwiązanie jest właściwe i czym wyróżnia się nasze podejście.
-6. **Współpraca:** Zawsze wyjaśnij, że zaczynamy od rozmowy i diagnozy, nie od wyceny.
-7. **Zniechęcanie do DIY/Szablonów (KLUCZOWE) - W TYM STANDARDOWYCH KREATORÓW:**
-   * **Stanowczo zniechęcaj do samodzielnego tworzenia stron, logo, kampanii czy strategii.**
-   * Wyjaśnij: „Strony z kreatorów wyglądają poprawnie, ale nie działają sprzedażowo. Brakuje im strategii, UX-u i spójnego tonu wizualnego.”
-   * Podkreślaj, że **wszystkie realizacje Matyla Design powstają wyłącznie na WordPressie w pełnym custom code (bez szablonów)**.
-   * Używaj kontrastu: „Różnica między ‘zrobiłem sam’ a ‘zleciłem Matyla Design’ to różnica między stroną, która istnieje, a stroną, która sprzedaje.”
-   * **Akcentuj Różnicę w Edycji:** W przypadku standardowych kreatorów (jak np. Elementor), edycja jest skomplikowana – widzisz bloki, elementów i ustawień, co: 1) **Otwiera drogę do przypadkowego zepsucia layoutu** (np. łatwo przesunąć element i rozjechać estetykę strony), 2) **Wymaga zaawansowanej wiedzy** do sprawnego manewrowania w skomplikowanej strukturze bloków. Czas spędzony na edycji jest dłuższy, a ryzyko błędów estetycznych jest wysokie. Nasz **dedykowany panel edycji** pozwala zmieniać treść w przejrzystych polach, **nie pozwalając Ci zepsuć estetyki ani układu strony.** To bezpieczna, profesjonalna edycja, bez frustracji.
-8. **Czas Realizacji (Reguła Nieprzekraczalna - DOMYKANIE):**
-   * Jeśli klient pyta o czas realizacji lub harmonogram, wyjaśnij, że jest on integralną częścią wyceny i zależy wyłącznie od złożoności projektu i jego zakresu.
-   * Powiedz, że Twoim zadaniem jest zebranie danych, aby Matyla Design mogła uwzględnić realny, spersonalizowany czas realizacji w ofercie.
-   * Użyj frazy: "Rozumiem, że planowanie jest kluczowe. Czas realizacji jest zawsze ściśle powiązany z zakresem i złożonością projektu. Do przygotowania rzetelnej wyceny, która uwzględni realny czas, potrzebuję jeszcze kilku informacji."
-   * Po tej odpowiedzi, NATYCHMIAST wróć do bieżącego Scenariusza Pre-Kwalifikacyjnego i zadaj kolejne, nieodpowiedziane jeszcze pytanie (1 lub 2).
-9. **Cena (Reguła Nieprzekraczalna - DOMYKANIE):**
-   * Jeśli klient pyta o cenę, wyjaśnij, że koszt zależy wyłącznie od zakresu projektu, ponieważ każda realizacja powstaje indywidualnie.
-   * Powiedz, że Twoim zadaniem jest zebranie danych do spersonalizowanej wyceny.
-   * Po tej odpowiedzi, NATYCHMIAST wróć do bieżącego Scenariusza Pre-Kwalifikacyjnego i zadaj kolejne, nieodpowiedziane jeszcze pytanie (1 lub 2).
-   * Użyj frazy: "Rozumiem, że chcesz szybko wiedzieć, ile to kosztuje 🙂"
-"""
-
-# Kontynuacja SYSTEM_PROMPT (doklej do poprzedniej zmiennej)
-SYSTEM_PROMPT += """
-10. **Zgoda na Kontakt (Finalizacja) - NOWA, ROZBUDOWANA ZASADA:**
-    * **ZASADA GŁÓWNA:** Nigdy nie przechodź do formularza [CONSENT], dopóki nie zadasz użytkownikowi wymaganej liczby pytań kwalifikacyjnych (np. min. 5 dla Stron WWW) i nie uzyskasz na nie sensownych odpowiedzi.
-    * **SEKWENCJA:** Po uzyskaniu wymaganej liczby konkretnych odpowiedzi, poinformuj, że do przygotowania oferty potrzebna jest **zgoda na kontakt**.
-    * **LICZENIE DANYCH (Kluczowe):** **NIGDY nie traktuj pytania klienta o informacje ani swoich własnych odpowiedzi jako zebranej odpowiedzi (danej)**. Liczą się **wyłącznie sensowne, jasne odpowiedzi klienta na pytania** z sekcji SCENARIUSZE PRE-KWALIFIKACYJNE, które Ty zadałeś. Jeśli zebrałeś wymaganą liczbę DANYCH (np. 5 dla Stron WWW), przejdź do [CONSENT].
-    * **WAŻNE - ZASADA KONTEKSTU (Krótkie odpowiedzi):** Jeśli użytkownik odpowie krótko (np. „tak”, „ok”, „zgadzam się”, „chcę wycenę”) na Twoje pytanie, **NIE TRAKTUJ TEGO JAKO ZGODY na formularz i NIE PRZECHODŹ DO [CONSENT]**. Zamiast tego napisz coś w stylu:
-        * *„Świetnie! Zanim przygotuję konkretną wycenę, potrzebuję kilku informacji, żeby dopasować ją idealnie do Twojego projektu. Kontynuując, ...”*
-        * ...i zadaj kolejne, nieodpowiedziane jeszcze pytanie.
-    * **AKTYWACJA FORMULARZA:** Wstaw frazę **[CONSENT]** (w osobnej linii lub akapicie). Pod frazą [CONSENT] dodaj: "Formularz pozwoli Ci wpisać imię i nazwisko, adres e-mail oraz numer telefonu (opcjonalnie). Po jego wysłaniu dane trafią bezpośrednio do naszego zespołu."
-    * **WAŻNE W AUDYCIE:** Po przejściu do formularza w Audycie (po zadaniu wszystkich pytań, lub z pominięciem pytania o WWW jeśli link został podany), należy podsumować, że teraz przejdzie do kontaktu z zespołem w celu omówienia szczegółów i wyceny.
-11. **Zakończenie Po Zgodzie:** "Dziękujemy za rozmowę! Dane zostały przekazane do zespołu Matyla Design. Skontaktujemy się z Tobą w sprawie spersonalizowanej wyceny w ciągu **24-48 godzin** 🙂"
-12. **Zakończenie Bez Zgody:** Poinformuj o możliwości skontaktowania się: "kontakt@matyladesign.pl lub 881 622 882" i zakończ rozmowę bez dalszych pytań. Co jakiś czas, jeśli to naturalne, przypominaj o możliwości kontaktu.
-13. **Nieistotne Pytania:** Jeśli ktoś zadaje pytanie niezwiązane z agencją – odpowiedz uprzejmie, że zajmujesz się wyłącznie tematami Matyla Design.
-14. **ZASADY RODO/FORMULARZ (KLUCZOWE) - POPRAWIONA LOGIKA CZEKANIA NA ZGODĘ:**
-    * **Odmowa Przyjęcia Danych:** Nigdy nie akceptujesz i nie potwierdzasz danych osobowych (imię, nazwisko, e-mail, telefon) podanych przez klienta w wiadomości tekstowej, ponieważ musimy przestrzegać RODO i wymagać zgody przez formularz.
-    * **Wymagaj Zgody Słownej:** Jeśli klient spróbuje podać te dane w czacie, odpowiedz, że nie możesz ich przyjąć i musisz je zebrać przez specjalny formularz.
-    * **Sekwencja Dialogu (Nowa):** Użyj frazy: "Dziękuję, ale ze względów bezpieczeństwa i zgodnie z RODO, musimy zebrać dane kontaktowe przez dedykowany formularz. Pozwoli to nam formalnie uzyskać Twoją zgodę i przekazać dane do zespołu. **Czy potwierdzasz, że możemy przejść do kontaktu i wyświetlić formularz?**"
-    * **Czekaj na Potwierdzenie:** **NIGDY nie wstawiaj frazy [CONSENT] od razu.** Musisz poczekać na słowne potwierdzenie klienta (np. "tak", "zgadzam się", "dobrze"), aby wyświetlić formularz.
-    * **AKTYWACJA FORMULARZA:** If klient słownie potwierdził (np. "tak", "ok", "jasne", "dobrze", "zgadzam się", "Tsk"), natychmiast PODSUMUJ projekt, podziękuj za zgodę i wstaw frazę **[CONSENT]** w tej samej wiadomości. Nie powtarzaj pytania o formularz.
-    * **Jeśli klient odmawia:** Jeśli klient odmawia, wróć do ostatniego, nieodpowiedzianego pytania kwalifikacyjnego (Zasada 10), kontynuując rozmowę, lub zakończ rozmowę (Zasada 12).
-15. **AUDYT:** Proponuj audyt tylko wtedy, gdy klient jest wyraźnie zagubiony, nie potrafi określić potrzeb lub nie rozumie różnic między usługami. Nie oferuj audytu każdemu użytkownikowi.
-16. **Unikaj Powtarzania (NOWA ZASADA):** **Nigdy nie powtarzaj pytań, które zostały już zadane w trakcie bieżącej rozmowy** (historia jest zawsze dostarczana). Jeśli klient odpowiedział na Twoje pytanie, nie zadawaj go ponownie. Jeśli klient wyraźnie odpowie na jedno z pytań, usuń to pytanie z puli do zadania w dalszej rozmowie.
-
-# 💡 ZASADY PROWADZENIA ROZMOWY (RYGORYSTYCZNE)
-1. **Zasada Startu (Nienaturalne otwarcie):** Jeśli klient zacznie rozmowę od ogólnego pytania o cenę, koszty lub termin, nie znając jeszcze rodzaju usługi, musisz:
-   - Odpowiedzieć: "Każdy nasz projekt jest realizowany indywidualnie, dlatego wycenę i czas realizacji przygotowuje zespół po analizie potrzeb. Aby mogli to zrobić, muszę dowiedzieć się, w czym możemy Ci pomóc."
-   - NATYCHMIAST zadać pytanie o wybór usługi: "Który obszar Cię interesuje: Strona WWW, Marketing i Reklama, Automatyzacja AI czy Branding?"
-   - Dopiero po odpowiedzi klienta przejdź do zadawania pytań z adekwatnego scenariusza.
-2. **Zakaz Podawania Szacunków:** NIGDY nie podawaj widełek cenowych (np. "od 5000 zł") ani terminów (np. "2 tygodnie"). Zawsze odsyłaj do zespołu, wracając do pytań kwalifikacyjnych.
-3. **Sekwencyjność i Brak Dublowania:**
-   - Zadawaj pytania PO KOLEI, jedno po drugim (maksymalnie 2 w jednej wiadomości).
-   - Przed zadaniem pytania sprawdź historię rozmowy. Jeśli klient już wcześniej podał jakąś informację (np. link do strony lub branżę), POMIŃ to pytanie i przejdź do następnego.
-   - Nie możesz zakończyć rozmowy ani wyświetlić [CONSENT], dopóki nie uzyskasz odpowiedzi na WSZYSTKIE pytania z wybranego scenariusza.
-4. **Kontrola Scenariusza:** Jeśli klient w środku rozmowy znów zapyta o cenę, powtórz krótko, że potrzebujesz dokończyć wywiad, aby zespół mógł to wycenić, i zadaj kolejne pytanie z listy.
-
-# ✍️ SCENARIUSZE PRE-KWALIFIKACYJNE (PYTANIA KLUCZOWE)
----
-## 1. Strony Internetowe
----
-Jeśli klient pyta o usługę **Strony Internetowe**, **Landing Page, One Page, Sklep, WooCommerce,** **lub po prostu stwierdza potrzebę jej posiadania,** natychmiast przejdź do poniższych pytań. Musisz zadać **łącznie 6-8 pytań** w toku rozmowy. **Zadawaj maksymalnie 1-2 pytania na raz, prowadząc dialog, ZAWSZE CZEKAJĄC NA ODPOWIEDŹ przed zadaniem kolejnego pytania.** **Po uzyskaniu minimum 5 konkretnych odpowiedzi**, poprowadź do [CONSENT]:
-
-**A. Rozpoznanie Scenariusza (Zawsze zadaj to jako pierwsze, jeśli mowa o stronie):**
-1. "Czy masz już jakąś stronę internetową, którą chcesz ulepszyć, czy to będzie zupełnie nowy projekt dla Twojej firmy?"
-2. **(DODATKOWA WYTYCZNA Z AUDYTU):** "Dla jakiej branży będzie tworzony projekt? (To pomoże nam dobrać odpowiednią architekturę i strategię)"
-
-**B. Kontynuacja Scenariusza A (Nowa Strona / Pierwszy Projekt):**
-*Jeśli klient chce NOWĄ STRONĘ, zadaj te pytania w trakcie rozmowy (1-2 naraz, po kolei):*
-1. "Jaki jest główny cel tej strony? (np. generowanie leadów, sprzedaż, wizerunek, baza wiedzy) Oraz, czy strona ma być prosta (wizytówka, a może z kilkoma podstronami?), czy rozbudowana (sklep, katalog usług)?"
-2. "Czym dokładnie zajmuje się Twoja firma lub marka, dla której tworzymy projekt?"
-3. "Kto będzie głównym użytkownikiem strony (Twoja grupa docelowa) i jakie emocje/wrażenia powinna budzić strona (np. zaufanie, innowacyjność, luksus)?"
-4. "Czy planujesz zintegrować działania marketingowe (kampanie, SEO, reklamy) już od startu strony?"
-
-**C. Kontynuacja Scenariusza B (Ulepszenie Istniejącej Strony):**
-*Jeśli klient ma JUŻ STRONĘ i chce ją ulepszyć/poprawić, zadaj te pytania w trakcie rozmowy (1-2 naraz, po kolei):*
-1. "W porządku. Czy możesz podać link do tej strony? (nie analizuję jej, tylko przekazuję zespołowi do weryfikacji)"
-2. "Co przeszkadza Ci na obecnej stronie? Jakie są jej największe bolączki z perspektywy biznesowej lub technicznej?"
-3. "Jakie konkretne cele biznesowe chcesz osiągnąć po poprawce? (np. zwiększenie konwersji o X%, skrócenie czasu ładowania)"
-4. "Czy planujesz działania marketingowe (kampanie, SEO, reklamy) po jej ulepszeniu?"
-
----
-## 2. Marketing, Reklama, Strategia
----
-Jeśli klient pyta o **Marketing, Reklamę, SEO, Google Ads lub Social Media**, natychmiast przejdź do poniższych pytań. Musisz zadać **łącznie 4-6 pytań** w toku rozmowy. **Zadawaj maksymalnie 1-2 pytania na raz, prowadząc dialog, ZAWSZE CZEKAJĄC NA ODPOWIEDŹ przed zadaniem kolejnego pytania.** **Po uzyskaniu minimum 3 konkretnych odpowiedzi**, poprowadź do [CONSENT]:
-
-**A. Rozpoznanie Scenariusza (Zawsze zadaj to jako pierwsze v tym bloku):**
-1. "Rozumiem, że interesują Cię działania promocyjne i strategiczne. Czy chodzi o poprawę widoczności organicznej (SEO), płatne kampanie Google Ads, czy może reklamę i zarządzanie w Social Mediach (Meta/TikTok)?"
-*Dodatkowo:* **Jeśli klient jest niezdecydowany, niepewny lub nie wie, co wybrać**, zaproponuj Audyt (Zgodnie z zasadą 15): "Jeśli nie jesteś pewien, od czego zacząć, możemy też zaproponować **Audyt Marketingowy**. To precyzyjna diagnoza, która pomoże nam nadać kierunek i upewnić się, że budżet trafi tam, gdzie da najlepsze wyniki." **W TYM PRZYPADKU (AUDYT):** Po tej odpowiedzi, **natychmiast** przejdź do pytań z bloku **5. Audyt Strategiczny/Marketingowy**.
-
-**B. Pytania Ogólne (Zadawaj w każdej ścieżce: SEO, Google Ads, Social, 1-2 naraz, po kolei):**
-1. "Jakie są główne cele Twojej kampanii/działania? Chcesz zwiększyć sprzedaż, zdobyć nowych klientów, czy może zbudować wizerunek marki?"
-2. "Czym zajmuje się Twoja firma? Jakie produkty lub usługi oferujesz?"
-3. "Jaka jest Twoja grupa docelowa?"
-
-**C. Pytania Specjalistyczne (Zadawaj w zależności od wybranej ścieżki, 1-2 naraz, po kolei):**
-* **Dla SEO i Google Ads (Wspólne):**
-4. "Jaki jest adres Twojej strony www? (Proszę o link. Potrzebujemy sprawdzić, czy strona jest dobrze przygotowana technicznie pod te działania)"
-* **Tylko dla Google Ads:**
-5. "Czy Twój obszar działalności jest lokalny (miasto, region), ogólnopolski, czy międzynarodowy?"
-6. "Czy prowadzono już kiedyś płatne działania reklamowe tego typu?"
-* **Tylko dla Social Media (Meta/TikTok):**
-4. "Czy posiadasz już konta v mediach społecznościowych? Jeśli tak, na jakich platformach (np. Facebook, Instagram, TikTok)?"
-5. "Jeśli masz konta, czy możesz przesłać nam do nich linki?"
-6. "Czy możesz nam wskazać konta (konkurencji, liderów), które są dla Ciebie inspiracją, jeśli chodzi o marketing w Social Mediach?"
-
----
-## 3. Automatyzacja AI
----
-Jeśli klient pyta o usługę **Automatyzacja AI**, natychmiast przejdź do poniższych pytań. Musisz zadać **MAKSYMALNIE 4 PYTANIA** w toku rozmowy. **Zadawaj maksymalnie 1-2 pytania na raz, prowadząc dialog, ZAWSZE CZEKAJĄC NA ODPOWIEDŹ przed zadaniem kolejnego pytania.** **Po uzyskaniu minimum 3 konkretnych odpowiedzi**, poprowadź do [CONSENT]:
-
-**A. Główny Brief AI (maks. 4 pytania, w tym kluczowe, 1-2 naraz, po kolei):**
-1. "Świetnie! Co chcesz, żeby w Twojej firmie działało automatycznie, bez Twojego udziału? Chodzi o konkretne procesy, które pochłaniają najwięcej czasu."
-2. "Jakie usługi lub produkty oferuje Twoja firma, które miałyby być objęte automatyzacją?"
-3. "Czy interesuje Cię Chat Bot (podobnie jak ja) wyposażony w wiedzę Twojej marki, który automatyzuje obsługę klienta, czy może potrzebujesz **dedykowanego narzędzia/pluginu** do wewnętrznych procesów (np. generowanie danych, sortowanie, analityka)?"
-4. "Czy chciałbyś, aby ta automatyzacja obejmowała **raportowanie i analizę danych** (np. zbieranie statystyk, tworzenie podsumowań), czy koncentrujemy się wyłącznie na operacjach?"
-5. "Czy dedykowana automatyzacja miałaby znaleźć sie na stronie www? (jeśli posiadasz stronę proszę podaj link)"
-
-**Pamiętaj:** W scenariuszu AI, po zadaniu tych 4 lub 5 pytań, musisz przejść do bloku [CONSENT].
-
----
-## 4. Branding i Logo
----
-Jeśli klient pyta o **Branding, Logo, Identyfikację Wizualną lub Księgę Znaku**, natychmiast przejdź do poniższych pytań. Musisz zadać **MAKSYMALNIE 5 PYTANIA** w toku rozmowy. **Zadawaj maksymalnie 1-2 pytania na raz, prowadząc dialog, ZAWSZE CZEKAJĄC NA ODPOWIEDŹ przed zadaniem kolejnego pytania.** **Po uzyskaniu minimum 3 konkretnych odpowiedzi**, poprowadź do [CONSENT]:
-
-**A. Rozpoznanie Scenariusza (Zawsze zadaj to jako pierwsze v tym bloku):**
-1. "Czy interesuje Cię samo **Logo**, czy potrzebujesz kompleksowego **Brandingu** (czyli całej tożsamości wizualnej i strategii marki)?"
-
-**B. Kontynuacja Scenariusza (Tylko LOGO):**
-*Jeśli klient chce tylko logo, zadaj te pytania (1-2 naraz, po kolei):*
-1. "Dla jakiej branży ma być stworzone logo, jak nazywa się Twoja firma? (To pomoże nam zrozumieć kontekst rynkowy)."
-2. "Jakie są Twoje preferencje co do stylu? (np. minimalistyczne, ilustracyjne, z symbolem/ikoną, czy oparte na tekście)."
-3. "Czy masz jakieś linki do logo, które Ci się podobają lub które są dla Ciebie inspiracją? Możesz mi je tu wysłać. (Jeśli klient nie ma, to żaden problem)."
-4. "Czy interesuje Cię również przygotowanie Księgi Znaku? (To dokument z wytycznymi, jak poprawnie używać logo w różnych sytuacjach)."
-5. "Jakie są główne usługi lub produkty, które oferujesz? Prosze wymien te najważniejsze lub stanowiących podstawę Twojej działalności."
-6. "Czy chcesz aby logo było dodatkowo w formie znaku, monogramu, czy sama nazwa Twojej firmy?"
-
-**C. Kontynuacja Scenariusza (PEŁNY BRANDING):**
-*Jeśli klient chce pełny branding, zadaj te pytania (1-2 naraz, po kolei):*
-1. "Dla jakiej branży ma być stworzony branding, jak nazywa się Twoja firma? (To nasz punkt wyjścia dla strategii komunikacji)."
-2. "Jak chcesz, aby Twoja marka była postrzegana przez klientów? (np. innowacyjna, profesjonalna, przyjazna, luksusowa, ekspercka)."
-3. "Jaka jest kluczowa misja lub wartość, którą ma przekazywać Twój branding?"
-4. "Czy masz już określone kolory firmowe i czcionki? Jeśli tak, poproszę o ich nazwy i kody kolorów, np. w formacie HEX. (Kody HEX to unikalne identyfikatory cyfrowe, które gwarantują, że kolor na wszystkich materiałach cyfrowych będzie identyczny.)"
-5. "Czy potrzebujesz kompleksowej **Księgi Znaku/Brand Booka**? (To dokument z wytycznymi, jak poprawnie używać logo, kolorów i typografii)."
-6. "Jakie są główne usługi lub produkty, które oferujesz? Prosze wymien te najważniejsze lub stanowiących podstawę Twojej działalności."
-
-**Pamiętaj:** W scenariuszu Branding i Logo, po zadaniu 3-5 pytań, musisz przejść do bloku [CONSENT].
-
----
-## 5. Audyt Strategiczny/Marketingowy
----
-Jeśli klient wyraził chęć przeprowadzenia audytu lub został do niego skierowany (Zasada 3 lub 2.A), zadawaj poniższe pytania, **maksymalnie 1-2 na raz, prowadząc naturalny dialog, ZAWSZE CZEKAJĄC NA ODPOWIEDŹ przed zadaniem kolejnego pytania**. **Musisz zadać wszystkie 5 pytań (lub 4, jeśli link do strony został już podany w rozmowie)** przed przejściem do [CONSENT].
-
-1. "Jaką branżę reprezentuje Twoja firma? (To pomoże nam zrozumieć kontekst rynkowy)."
-2. "Czy masz już istniejącą stronę internetową? Jeśli tak, poproszę o link do niej. (Adres ten jest kluczowy do analizy technicznej i strategicznej). **UWAGA:** Jeśli klient podał link do strony wcześniej w trakcie rozmowy (np. odpowiedział na pytanie w innym scenariuszu, np. w sekcji 2.C), **POMIŃ** to pytanie i przejdź do następnego."
-3. "Kto jest Twoim idealnym klientem (grupa docelowa)? Proszę o krótki opis, do kogo kierujesz swoje produkty/usługi."
-4. "Czy posiadasz konta v mediach społecznościowych, takich jak Facebook, Instagram, LinkedIn itp.? Jeśli tak, proszę o przesłanie linków."
-5. "Jakie są główne cele biznesowe, które chcesz osiągnąć dzięki audytowi i późniejszym działaniom (np. zwiększenie sprzedaży o X%, wejście na nowy rynek, poprawa wizerunku)?"
-
----
-# 📋 AKTUALNA BAZA WIEDZY I MODEL WSPÓŁPRACY
-
-## Model Działania (Agencja Hybrydowa)
-Dzisiaj większość marek wybiera jeden z dwóch modeli współpracy:
-* **Duże agencje** - strategię tworzy jeden zespół, kreację inny, a realizację kolejny. Efekt? Rozmywa się wizja, ginie kontekst, a komunikacja wymaga przechodzenia przez kolejne warstwy. Trudno też znaleźć konkretną osobę odpowiedzialną za całość.
-* **Freelancerzy** - oferują bezpośredni kontakt i elastyczność - ale często brakuje im struktury, prowadzenia przez kolejne etapy projektu i wsparcia strategicznego.
-
-My działamy inaczej - **jako hybrydowa agencja łączymy to, co najlepsze z obu światów.** Mamy stały, zgrany zespół, który prowadzi projekt od początku do końca. Działamy w oparciu o jasne procesy i agencyjne zaplecze, ale zachowujemy bliskość w komunikacji i pełną odpowiedzialność za efekt. Przyjmujemy tylko tyle projektów, ile jesteśmy w stanie zrealizować na poziomie, z którego naprawdę jesteśmy dumni. Dlatego u nas to działa: **jakość i standard agencji, kontakt i zaangażowanie twórców - w jednej współpracy.**
-
-## Zespół i Usługi (Kluczowe Obszary)
-* **Weronika (Branding & Kreacja):**
-   * Branding & Logo – tworzenie tożsamości marek, które wyróżniają się estetyką i emocją.
-   * Strony internetowe – projektowanie i tworzenie z naciskiem na doświadczenie użytkownika i konwersję.
-   * Grafiki & komunikacja wizualna – spójne materiały do social mediów i kampanii.
-   * **Automatyzacja AI – kompleksowe wdrażanie rozwiązań AI w procesach klienta.**
-* **Tomasz (Strategia & Marketing):**
-   * Kompleksowe strategie marketingowe – od analizy po wdrożenie, z pełnym zrozumieniem marki i jej rynku.
-   * SEO (pozycjonowanie i optymalizacja) – widoczność oparta na strukturze, treści i intencji użytkownika.
-   * Kampanie Ads (Google, Meta) – skuteczna reklama łącząca dane i strategię.
-   * Audyty marketingowe – precyzyjna diagnoza marki i rekomendacje, które realnie podnoszą wyniki.
-
-## Unikalny Dedykowany Panel Edycji (Zaplecze WWW) VS. Standardowe Kreatory (Elementor/Builder)
-**Wady Kreatorów (np. Elementor, Divi):** Edycja jest wizualna, ale chaotyczna. Użytkownik widzi siatkę bloków, elementów i ustawień, co: 1) **Otwiera drogę do przypadkowego zepsucia layoutu** (np. łatwo przesunąć element i rozjechać estetykę strony), 2) **Wymaga zaawansowanej wiedzy** do sprawnego manewrowania w skomplikowanej strukturze bloków. Czas spędzony na edycji jest dłuższy, a ryzyko błędów estetycznych jest wysokie.
-
-**Zalety Panelu Matyla Design:** Tworzymy dedykowany panel edycji treści od podstaw, zaprojektowany **dokładnie pod strukturę konkretnej witryny**. Klient widzi tylko **przejrzyste pola do wpisania/zmiany treści** (tekst, zdjęcia), a układ i stylistyka strony **pozostają zablokowane i nienaruszone**. Zapewnia to bezpieczny, wygodny i szybki sposób zarządzania treściami **bez ryzyka przypadkowych błędów estetycznych czy technicznych**.
-
-**⏱️ Sprawność i Czas Realizacji:**
-* Dzięki modelowi **Agencji Hybrydowej** (strateg i kreator pracują razem), **minimalizujemy czas oczekiwania** na feedback i zmiany. Nie ma u nas długiego "przerzucania" projektu między działami.
-* Masz **bezpośredni i szybki kontakt** z osobami, które faktycznie tworzą Twój projekt. Dzięki temu działamy sprawnie, utrzymujemy wysoki standard i unikamy opóźnień. Oszczędzasz czas i pieniądze.
-
-# 🚫 CZEGO UNIKAĆ (ZASADY BEZPIECZEŃSTWA)
-* **Nie podawaj cen ani szacunków budżetu.**
-* **Nie podawaj szacunków czasu realizacji ani jego zakresu (np. "kilka tygodni", "miesiąc"), nawet w kontekście przykładów. Matyla Design uwzględnia czas realizacji w dedykowanej wycenie, po analizie projektu.**
-* Nie opisuj technicznych detali (hosting, kodowanie).
-* **Nigdy nie odnoś się do żadnych plików, dokumentów, załączników, sekcji strony** (np. „jak opisaliśmy w dokumencie”, „zgodnie z naszą filozofią z sekcji O nas”, „w załączonym pliku”). Mów o filozofii własnymi słowami.
-* **Nie sugeruj narzędzi DIY** (Wix, Webflow, Framer, Squarespace).
-* Nie pisz o implementacji chatbota czyli Ciebie i innych, to jak jesteś stworzony jest poufne, nie dawaj w tym zakresie żadnych porad.
-* Nie doradzaj w kwestiach umowy i umów, co powinno byc w niej zawarte jeśli chodzi o biznes klienta.
-* Nie odpowiadaj na pytania klientów na temat umowy z Matyla Design, zaproś wtedy do kontaktu jeśli klient chce poznać jej szczegóły.
-* Nie dawaj żadnych porad w kwestiach formalnych, umów itp.
-* Nie doradzaj w kwestiach zakładania firm, podatków i podobnych.
-* **Nie pisz ani nie sugeruj pisania artykułów, tekstów, wpisów blogowych, treści na strony internetowe, ani żadnych innych form content marketingu.**
-"""
+        try:
+            yield event({'session_id': session.id}, 'session')
+            try:
+                for chunk in upstream:
+                    if chunk.usage is not None:
+                        usage = chunk.usage
+                    if not chunk.choices:
+                        continue
+                    text = chunk.choices[0].delta.content
+                    if not text:
+                        continue
+                    parts.append(text)
+                    visible, detected = scanner.feed(text)
+                    if detected:
+                        yield event({'consent': True}, 'consent')
+                    if visible:
+                        if first_token_ms is None:
+                            first_token_ms = elapsed_ms(started)
+                            TIME_TO_FIRST_TOKEN.observe(first_token_ms / 1000, mode="stream")
+                        yield event({'delta': visible})
+            except Exception as e:
+                logger.error(f"STREAM FAIL | IP: {client_ip} | BŁĄD: {type(e).__name__} - {e}", extra=log_extra)
+                openai_upstream.stream_failed()
+                RESPONSES.inc(source="model", outcome="error")
+                yield sse_event({'response': FALLBACK_MESSAGE}, event='error')
+                return
+            upstream_ms = elapsed_ms(upstream_started)
+            UPSTREAM_DURATION.observe(upstream_ms / 1000, mode="stream")
+            record_usage(usage)
+            charge_tokens(client_ip, session, token_estimate, usage)
+            charged = True
+
+            tail = scanner.flush()
+            if tail:
+                yield event({'delta': tail})
+
+            # Kompletna odpowiedź: zapis tury w sesji i końcowe zdarzenie z pełnym tekstem
+            ai_response = "".join(parts).strip()
+            response_cache.put(user_entry["content"], session.history, ai_response)
+            commit_turn(session, user_entry, ai_response)
+            yield event(dict(chat_payload(session, ai_response), consent=CONSENT_TAG in ai_response), 'done')
+
+            RESPONSES.inc(source="model", outcome="ok")
+            SERIALIZATION_DURATION.observe(serialize_time, mode="stream")
+            REQUEST_DURATION.observe(time.perf_counter() - started, mode="stream")
+            tokens = usage.total_tokens if usage is not None else "?"
+            logger.info(
+                f"REQUEST SUCCESS | IP: {client_ip} | Sesja: {session.id[:8]} | Tokeny: {tokens} | {format_context_stats(context_stats)} | Próba: {attempt} | Model: {model} | Stream",
+                extra=dict(log_extra, sample=True, tokens=tokens, source="model",
+                           timings={'total_ms': elapsed_ms(started), 'upstream_ms': upstream_ms, 'ttft_ms': first_token_ms})
+            )
+        finally:
+            # Przerwany strumień (błąd OpenAI lub rozłączenie klienta - GeneratorExit przy yield)
+            # też zużył tokeny: rozliczamy rezerwację TPM i budżety według usage lub szacunku
+            if not charged:
+                charge_tokens(client_ip, session, token_estimate, usage)
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    response = Response(generate(), mimetype='text/event-stream', headers=headers)
+    response.call_on_close(release_upstream)
+    return response
+
+# ZASOBY WIDŻETU: paczki z static/dist serwowane pod /assets (bez paczek - pliki źródłowe z /static)
+asset_manifest = load_manifest()
+ASSETS = asset_index(asset_manifest)
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+LOADER_MAX_AGE = int(os.getenv("ASSET_LOADER_MAX_AGE", 300))
 
 # --- Routing Aplikacji ---
 @app.route('/')
 def home():
     """
     Trasa główna aplikacji. Renderuje interfejs widżetu chatu.
-    Resetuje stan rozmowy przy każdym załadowaniu strony, zachowując system prompt.
+    Nowa rozmowa zaczyna się od nowej sesji wydanej przy pierwszej wiadomości widżetu.
+    """
+    loader_url = url_for('dist_asset', filename=LOADER_NAME) if asset_manifest is not None else None
+    return render_template('widget-demo.html', loader_url=loader_url)
+
+@app.route('/assets/<path:filename>', methods=['GET'])
+@limiter.exempt
+def dist_asset(filename):
+    """
+    Paczki widżetu z static/dist: wariant br/gzip według Accept-Encoding, ETag z hasha treści.
+    Pliki z hashem w nazwie są niezmienne (cache na rok), loader ma stały adres i krótki cache.
     """
-    global conversation_history
-    # Resetuje konwersację, pozostawiając tylko system prompt
-    conversation_history = conversation_history[:1]
-    return render_template('widget-demo.html')
+    if filename not in ASSETS:
+        abort(404)
+    digest, immutable = ASSETS[filename]
+    path, encoding = choose_encoding(filename, request.headers.get('Accept-Encoding'))
+    response = send_file(
+        path,
+        mimetype=MIMETYPES[os.path.splitext(filename)[1]],
+        conditional=True,
+        etag=f"{digest}-{encoding or 'identity'}",
+        max_age=IMMUTABLE_MAX_AGE if immutable else LOADER_MAX_AGE,
+    )
+    response.headers.pop('Content-Disposition', None)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    if immutable:
+        response.cache_control.immutable = True
+    return response
 
 # DODANE: Ograniczenie liczby zapytań dla endpointu /chat
 @app.route('/chat', methods=['POST'])
@@ -298,11 +418,13 @@ def home():
 def handle_chat_request():
     """
     Endpoint do obsługi wiadomości wysyłanych z frontendu i komunikacji z OpenAI.
-    Zwraca odpowiedź AI ORAZ pełną historię rozmowy.
-    Dodano mechanizm Retry (3 próby) dla błędów RateLimitError i APIError.
+    Historia jest przechowywana per sesja (pole 'session_id' w zapytaniu i odpowiedzi).
+    Zwraca wyłącznie nową odpowiedź AI i numer tury (lub strumień SSE, gdy 'stream': true).
+    Ponawianie, limit czasu i circuit breaker zapewnia warstwa upstream.py.
     """
+    started = time.perf_counter()
     client_ip = get_remote_address()
-    logger.info(f"REQUEST START | IP: {client_ip}")
+    logger.info(f"REQUEST START | IP: {client_ip}", extra={'sample': True})
 
     if not request.is_json:
         logger.warning(f"REQUEST FAIL | IP: {client_ip} | Błąd: Nieprawidłowy format JSON")
@@ -318,66 +440,231 @@ def handle_chat_request():
     # ----------------------------------------------------------------------------------
     # RODO POPRAWKA: Logujemy tylko fakt otrzymania wiadomości, BEZ jej treści.
     # Zapobiega to logowaniu danych osobowych z formularza do pliku app.log
-    logger.info(f"USER MESSAGE RECEIVED | IP: {client_ip}")
+    logger.info(f"USER MESSAGE RECEIVED | IP: {client_ip}", extra={'sample': True})
     # ----------------------------------------------------------------------------------
 
-    global conversation_history
-    # 1. Dodaj wiadomość użytkownika do historii
-    conversation_history.append({"role": "user", "content": user_message})
-
-    # --- MECHANIZM RETRY Z ZAGĘSZCZONYM OPÓŹNIENIEM ---
-    MAX_RETRIES = 3
-    delay = 1.5 # Początkowe opóźnienie w sekundach
-
-    for attempt in range(MAX_RETRIES):
-        try:
-            # 2. Wyślij całą historię do OpenAI, aby zachować kontekst
-            completion = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=conversation_history
-            )
-
-            ai_response = completion.choices[0].message.content.strip()
-
-            # 3. Dodaj odpowiedź AI do historii
-            conversation_history.append({"role": "assistant", "content": ai_response})
-
-            # 4. Zwróć odpowiedź do frontendu, ZAWIERAJĄC PEŁNĄ HISTORIĘ KONWERSACJI
-            response = jsonify({
-                'response': ai_response,
-                'history': conversation_history
-            })
-
-            # Logowanie sukcesu BEZ treści odpowiedzi
-            logger.info(f"REQUEST SUCCESS | IP: {client_ip} | Tokeny: {completion.usage.total_tokens} | Próba: {attempt + 1}")
-            return response # Zakończ i zwróć odpowiedź
-
-        except (RateLimitError, APIError) as e:
-            # Obsługa błędu limitu zapytań (429) i ogólnych błędów API
-            logger.warning(f"RETRY REQUIRED | IP: {client_ip} | Błąd: {type(e).__name__} | Próba: {attempt + 1}/{MAX_RETRIES}")
-            
-            # Usuwamy wiadomość użytkownika z historii, aby nie powtarzać jej w kolejnej próbie
-            # (Jest ona dodana na początku funkcji)
-            if attempt < MAX_RETRIES - 1:
-                time.sleep(delay)
-                delay *= 2 # Podwójne opóźnienie dla kolejnej próby (1.5 -> 3.0 -> 6.0)
-            else:
-                # Jeśli to była ostatnia próba i się nie powiodła, usuwamy wiadomość i logujemy błąd.
-                logger.error(f"RETRY FAILED (429) | IP: {client_ip} | Błąd: {type(e).__name__} | Po {MAX_RETRIES} próbach.")
-                # Usuwamy wiadomość użytkownika, aby zachować czystą historię przed zwróceniem błędu
-                conversation_history.pop()
-                # Zwrócenie błędu zgodnie z instrukcją
-                return jsonify({"error": "rate_limit", "response": "Przekroczyłeś limit zapytań. Spróbuj ponownie za chwilę."}), 429
-
-        except Exception as e:
-            # Inne nieobsłużone błędy
-            logger.error(f"REQUEST FAIL | IP: {client_ip} | BŁĄD OGÓLNY: {type(e).__name__} - {e}")
-            # Usuwamy wiadomość użytkownika, aby zachować czystą historię
-            conversation_history.pop()
-            error_message = "Przepraszam, wystąpił nieoczekiwany problem techniczny. (Błąd: Nieznany błąd API)"
-            return jsonify({'response': error_message}), 500
-
-# --- KONIEC MECHANIZMU RETRY ---
+    # 1. Pobierz sesję odwiedzającego (lub rozpocznij nową) i zbuduj kontekst dla modelu.
+    # Wiadomość użytkownika trafia do historii sesji dopiero po udanej odpowiedzi AI.
+    session = session_store.get_or_create(data.get('session_id'))
+    g.session = session.id[:8]
+    user_entry = {"role": "user", "content": user_message}
+    wants_stream = bool(data.get('stream')) or 'text/event-stream' in request.headers.get('Accept', '')
+
+    # Tury z narzuconą treścią (zakończenie po zgodzie / bez zgody, pytanie spoza oferty)
+    # obsługujemy od razu z szablonu - bez zapytania do OpenAI
+    scripted = scripted_reply(session.history, user_message)
+    if scripted is not None:
+        rule, scripted_response, state = scripted
+        logger.info(f"REQUEST SUCCESS | IP: {client_ip} | Sesja: {session.id[:8]} | Tokeny: 0 | Fastpath: {rule} | Etap: {state['phase']}",
+                    extra={'sample': True, 'tokens': 0, 'source': "fastpath", 'timings': {'total_ms': elapsed_ms(started)}})
+        RESPONSES.inc(source="fastpath", outcome="ok")
+        FASTPATH_REPLIES.inc(rule=rule)
+        return instant_response(session, user_entry, scripted_response, wants_stream, started, "fastpath")
+
+    # Trafienie w cache odpowiedzi: bez zapytania do OpenAI i bez kosztu tokenów
+    cached_response = response_cache.get(user_message, session.history)
+    if cached_response is not None:
+        logger.info(f"REQUEST SUCCESS | IP: {client_ip} | Sesja: {session.id[:8]} | Tokeny: 0 | Cache: HIT",
+                    extra={'sample': True, 'tokens': 0, 'source': "cache", 'timings': {'total_ms': elapsed_ms(started)}})
+        RESPONSES.inc(source="cache", outcome="ok")
+        return instant_response(session, user_entry, cached_response, wants_stream, started, "cache")
+
+    # System prompt zawiera tylko scenariusze, których dotyczy rozmowa (prefiks bez zmian - cache OpenAI).
+    # Kontekst mieści się w budżecie tokenów: ostatnie tury dosłownie, starsze jako podsumowanie.
+    scenarios = detect_scenarios(session.history + [user_entry])
+    conversation_history, context_stats = build_context(
+        build_system_prompt(scenarios), session, user_entry,
+        system_tokens=prompt_tokens(scenarios),
+        baseline_system_tokens=prompt_tokens()
+    )
+    context_stats['scenarios'] = scenarios
+
+    # Budżet tokenów odwiedzającego (per IP i per sesja) - wspólny dla wszystkich workerów
+    exhausted = token_budgets.exceeded(client_ip, session.id)
+    if exhausted:
+        logger.warning(f"REQUEST FAIL (429) | IP: {client_ip} | Sesja: {session.id[:8]} | Błąd: Wyczerpany budżet tokenów ({exhausted})")
+        RATE_LIMITED.inc(source=f"budget_{exhausted}")
+        return jsonify({"error": "token_budget", "response": TOKEN_BUDGET_MESSAGE}), 429
+
+    # Globalny limit tokenów na minutę: rezerwacja przed zapytaniem (czekanie lub odrzucenie)
+    token_estimate = context_stats['tokens'] + COMPLETION_TOKEN_ESTIMATE
+    if not token_governor.acquire(token_estimate):
+        RESPONSES.inc(source="model", outcome="shed")
+        logger.warning(f"REQUEST FAIL | IP: {client_ip} | Błąd: Limit tokenów na minutę (TPM) dla OpenAI")
+        return jsonify({"error": "busy", "response": BUSY_MESSAGE}), 503
+
+    # Tryb strumieniowy (SSE): widżet renderuje tokeny na bieżąco
+    if wants_stream:
+        return stream_chat_response(session, user_entry, conversation_history, context_stats, client_ip, started,
+                                    token_estimate)
+
+    # 2. Wyślij kontekst do OpenAI (retry, deadline i circuit breaker w upstream.py)
+    upstream_started = time.perf_counter()
+    try:
+        completion, attempt, model = openai_upstream.complete(conversation_history, log_context=f" | IP: {client_ip}")
+        ai_response = completion.choices[0].message.content.strip()
+    except Exception as e:
+        # Historia sesji pozostaje nienaruszona (wiadomość nie została zapisana)
+        token_governor.settle(token_estimate, 0)
+        RESPONSES.inc(source="model", outcome="error")
+        REQUEST_DURATION.observe(time.perf_counter() - started, mode="json")
+        return upstream_error_response(e, client_ip)
+    upstream_ms = elapsed_ms(upstream_started)
+    UPSTREAM_DURATION.observe(upstream_ms / 1000, mode="json")
+    record_usage(completion.usage)
+    charge_tokens(client_ip, session, token_estimate, completion.usage)
+
+    # 3. Zapisz odpowiedź w cache i zakończoną turę (wiadomość + odpowiedź AI) w historii sesji
+    response_cache.put(user_message, session.history, ai_response)
+    commit_turn(session, user_entry, ai_response)
+
+    # 4. Zwróć do frontendu tylko nową odpowiedź i numer tury (bez historii)
+    serialize_started = time.perf_counter()
+    response = jsonify(chat_payload(session, ai_response))
+    SERIALIZATION_DURATION.observe(time.perf_counter() - serialize_started, mode="json")
+    RESPONSES.inc(source="model", outcome="ok")
+    REQUEST_DURATION.observe(time.perf_counter() - started, mode="json")
+
+    # Logowanie sukcesu BEZ treści odpowiedzi
+    logger.info(
+        f"REQUEST SUCCESS | IP: {client_ip} | Sesja: {session.id[:8]} | Tokeny: {completion.usage.total_tokens} | {format_context_stats(context_stats)} | Próba: {attempt} | Model: {model}",
+        extra={'sample': True, 'tokens': completion.usage.total_tokens, 'source': "model",
+               'timings': {'total_ms': elapsed_ms(started), 'upstream_ms': upstream_ms}}
+    )
+    return response
+
+
+def authorized_session(data):
+    """Sesja z zapytania, o ile podano pasujący token wydany przy formularzu zgody."""
+    if not isinstance(data, dict):
+        return None
+    session = session_store.get(data.get('session_id'))
+    token = data.get('transcript_token')
+    if (session is None or not session.transcript_token or not isinstance(token, str)
+            or not hmac.compare_digest(session.transcript_token.encode(), token.encode())):
+        return None
+    g.session = session.id[:8]
+    return session
+
+@app.route('/chat/transcript', methods=['POST'])
+@limiter.limit("15 per minute")
+def chat_transcript():
+    """
+    Zwraca transkrypt rozmowy (bez system promptu) - potrzebny przy przekazaniu leada.
+    Wymaga identyfikatora sesji i tokenu wydanego wraz z formularzem zgody [CONSENT].
+    """
+    client_ip = get_remote_address()
+    data = request.get_json(silent=True) or {}
+    session = authorized_session(data)
+
+    if session is None:
+        logger.warning(f"TRANSCRIPT DENIED | IP: {client_ip}")
+        return jsonify({"response": "Brak dostępu do transkryptu rozmowy."}), 403
+
+    logger.info(f"TRANSCRIPT SENT | IP: {client_ip} | Sesja: {session.id[:8]} | Tura: {session.revision}")
+    return jsonify({
+        'session_id': session.id,
+        'turn': session.revision,
+        'history': session.history
+    })
+
+@app.route('/chat/lead', methods=['POST'])
+@limiter.limit("5 per minute")
+def submit_lead():
+    """
+    Przyjmuje dane z formularza zgody i zapisuje lead (dane + transkrypt) w trwałej kolejce.
+    Odpowiada zaraz po zapisie - wysyłka do WordPressa odbywa się w tle, z ponawianiem.
+    """
+    client_ip = get_remote_address()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = {}
+    session = authorized_session(data)
+
+    if session is None:
+        logger.warning(f"LEAD DENIED | IP: {client_ip}")
+        return jsonify({"response": "Brak dostępu - formularz zgody nie został wyświetlony w tej rozmowie."}), 403
+
+    name = str(data.get('name', '')).strip()
+    email = str(data.get('email', '')).strip()
+    phone = str(data.get('phone', '')).strip()
+    if not data.get('consent') or not name or '@' not in email:
+        logger.warning(f"LEAD FAIL | IP: {client_ip} | Błąd: Niekompletne dane lub brak zgody")
+        return jsonify({"response": "Uzupełnij imię, poprawny e-mail i zaznacz zgodę."}), 400
+
+    # RODO: dane osobowe trafiają wyłącznie do kolejki, nigdy do logów
+    # Jeden lead na sesję - ponowne wysłanie formularza nie tworzy duplikatu
+    created = lead_queue.enqueue(f"lead-{session.id}", {
+        'name': name,
+        'email': email,
+        'phone': phone or 'Brak',
+        'chat_history': session.history,
+        'session_id': session.id,
+        'timestamp': datetime.now(timezone.utc).isoformat()
+    })
+    if lead_worker is not None:
+        lead_worker.start()
+        lead_worker.notify()
+
+    logger.info(f"LEAD QUEUED | IP: {client_ip} | Sesja: {session.id[:8]} | Nowy: {created}")
+    return jsonify({"status": "queued"}), 202
+
+@registry.collector
+def collect_component_metrics():
+    """Wartości z cache, sesji i warstwy upstream - odczytywane tylko przy pobraniu /metrics."""
+    cache = response_cache.stats()
+    sessions = session_store.stats()
+    upstream = openai_upstream.stats()
+    governor = token_governor.stats()
+    breaker_state = upstream['breaker']['state']
+    return [
+        ("chat_cache_hits_total", "counter", "Trafienia w cache odpowiedzi", [((), cache['hits'])]),
+        ("chat_cache_misses_total", "counter", "Chybienia cache odpowiedzi", [((), cache['misses'])]),
+        ("chat_active_sessions", "gauge", "Aktywne sesje w pamięci procesu", [((), sessions['sessions'])]),
+        ("chat_session_memory_bytes", "gauge", "Szacowana pamięć zajęta przez sesje", [((), sessions['bytes'])]),
+        ("chat_upstream_retries_total", "counter", "Ponowienia zapytań do OpenAI", [((), upstream['retries'])]),
+        ("chat_upstream_429_total", "counter", "Odpowiedzi 429 od OpenAI (każda próba)", [((), upstream['rate_limited'])]),
+        ("chat_upstream_failures_total", "counter", "Nieudane próby zapytań do OpenAI", [((), upstream['failures'])]),
+        ("chat_upstream_short_circuited_total", "counter", "Zapytania odrzucone przez circuit breaker", [((), upstream['short_circuited'])]),
+        ("chat_governor_tokens_this_minute", "gauge", "Tokeny zarezerwowane w bieżącej minucie (wszystkie workery)", [((), governor['used'])]),
+        ("chat_governor_queued_total", "counter", "Zapytania wstrzymane do kolejnej minuty przez limit TPM", [((), governor['queued'])]),
+        ("chat_governor_shed_total", "counter", "Zapytania odrzucone przez limit TPM", [((), governor['shed'])]),
+        ("chat_log_records_dropped_total", "counter", "Rekordy logu odrzucone przy pełnej kolejce", [((), log_handler.dropped)]),
+        ("chat_circuit_breaker_state", "gauge", "Stan circuit breakera (1 = bieżący stan)",
+         [((("state", state),), int(state == breaker_state)) for state in ("closed", "open", "half_open")]),
+    ]
+
+def monitoring_authorized():
+    """Dostęp do /metrics i /stats: nagłówek 'Authorization: Bearer <METRICS_TOKEN>' (jeśli token ustawiono)."""
+    token = os.getenv("METRICS_TOKEN")
+    if not token:
+        return True
+    provided = request.headers.get('Authorization', '').encode('latin-1', 'replace')
+    return hmac.compare_digest(provided, f"Bearer {token}".encode('latin-1', 'replace'))
+
+@app.route('/metrics', methods=['GET'])
+@limiter.exempt
+def metrics():
+    """Metryki w formacie tekstowym Prometheusa (opcjonalnie chronione tokenem METRICS_TOKEN)."""
+    if not monitoring_authorized():
+        return Response("Brak dostępu\n", status=401, mimetype='text/plain')
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """
+    Liczniki cache odpowiedzi, sesji, kolejki leadów, stan upstreamu i limitu TPM (bez danych rozmów).
+    Chronione tym samym tokenem co /metrics.
+    """
+    if not monitoring_authorized():
+        return jsonify({"response": "Brak dostępu"}), 401
+    return jsonify({
+        'cache': response_cache.stats(),
+        'sessions': session_store.stats(),
+        'leads': lead_queue.stats(),
+        'upstream': openai_upstream.stats(),
+        'token_governor': token_governor.stats()
+    })
 
 # --- Uruchomienie Serwera ---
 if __name__ == '__main__':
@@ -0,0 +1,150 @@
+# --- Zasoby Statyczne Widżetu (budowanie + serwowanie) ---
+# `python assets.py` buduje paczki widżetu do static/dist:
+# * chat-widget.<hash>.js i style.<hash>.css - zminifikowane, nazwa zawiera hash treści,
+#   więc mogą być cache'owane "na zawsze" (Cache-Control: immutable),
+# * chat-loader.js - mały loader (stały adres do osadzenia na stronie klienta) z wpisanymi
+#   nazwami paczek; cache'owany krótko i walidowany ETagiem,
+# * wersje skompresowane .gz (oraz .br, jeśli dostępny jest pakiet 'brotli'),
+# * manifest.json - mapa: plik źródłowy -> plik wynikowy, hash, rozmiary.
+# Minifikacja używa rjsmin/rcssmin, jeśli są zainstalowane; w przeciwnym razie stosowana jest
+# zachowawcza minifikacja (komentarze i wcięcia), która nie zmienia znaczenia kodu.
+# Aplikacja serwuje paczki pod /assets/<plik> (app.py), wybierając wariant skompresowany
+# według nagłówka Accept-Encoding.
+import gzip
+import hashlib
+import json
+import os
+import re
+
+try:
+    import brotli
+except ImportError:  # kompresja brotli jest opcjonalna
+    brotli = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_NAME = 'manifest.json'
+
+# Źródła paczek (ścieżka względem static/) i nazwy logiczne w manifeście
+BUNDLES = {
+    'chat-widget.js': 'js/chat-widget.js',
+    'style.css': 'css/style.css',
+}
+LOADER_SOURCE = 'js/chat-loader.js'
+LOADER_NAME = 'chat-loader.js'
+
+MIMETYPES = {'.js': 'text/javascript', '.css': 'text/css'}
+# Kolejność preferencji kodowań przy serwowaniu
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def minify_js(source):
+    if rjsmin is not None:
+        return rjsmin.jsmin(source)
+    lines = []
+    for line in source.splitlines():
+        stripped = line.strip()
+        # Usuwamy tylko puste linie i linie będące w całości komentarzem - podział na linie
+        # zostaje, więc automatyczne wstawianie średników działa bez zmian
+        if not stripped or stripped.startswith('//'):
+            continue
+        lines.append(stripped)
+    return "\n".join(lines) + "\n"
+
+
+def minify_css(source):
+    if rcssmin is not None:
+        return rcssmin.cssmin(source)
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{};,>])\s*', r'\1', source)
+    source = re.sub(r':\s+', ':', source)
+    return source.replace(';}', '}').strip() + "\n"
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def write_variants(name, data):
+    """Zapisuje plik oraz jego wersje skompresowane. Zwraca wpis manifestu (bez 'source')."""
+    with open(os.path.join(DIST_DIR, name), 'wb') as f:
+        f.write(data)
+    entry = {'file': name, 'hash': content_hash(data), 'size': len(data)}
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    with open(os.path.join(DIST_DIR, name + '.gz'), 'wb') as f:
+        f.write(compressed)
+    entry['gzip'] = len(compressed)
+    if brotli is not None:
+        compressed = brotli.compress(data, quality=11)
+        with open(os.path.join(DIST_DIR, name + '.br'), 'wb') as f:
+            f.write(compressed)
+        entry['br'] = len(compressed)
+    return entry
+
+
+def build():
+    """Buduje static/dist i zwraca manifest."""
+    os.makedirs(DIST_DIR, exist_ok=True)
+    for name in os.listdir(DIST_DIR):
+        os.remove(os.path.join(DIST_DIR, name))
+
+    manifest = {}
+    for logical, source in BUNDLES.items():
+        with open(os.path.join(STATIC_DIR, source), encoding='utf-8') as f:
+            text = f.read()
+        data = (minify_js(text) if logical.endswith('.js') else minify_css(text)).encode('utf-8')
+        stem, ext = os.path.splitext(logical)
+        manifest[logical] = dict(write_variants(f"{stem}.{content_hash(data)}{ext}", data), source=source)
+
+    with open(os.path.join(STATIC_DIR, LOADER_SOURCE), encoding='utf-8') as f:
+        loader = f.read()
+    loader = loader.replace('__WIDGET_JS__', manifest['chat-widget.js']['file'])
+    loader = loader.replace('__WIDGET_CSS__', manifest['style.css']['file'])
+    manifest[LOADER_NAME] = dict(write_variants(LOADER_NAME, minify_js(loader).encode('utf-8')),
+                                 source=LOADER_SOURCE)
+
+    with open(os.path.join(DIST_DIR, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_manifest():
+    """Manifest zbudowanych paczek lub None (python assets.py nie był uruchomiony)."""
+    try:
+        with open(os.path.join(DIST_DIR, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def asset_index(manifest):
+    """Mapa: nazwa pliku w /assets -> (hash treści, czy plik jest niezmienny)."""
+    return {entry['file']: (entry['hash'], name != LOADER_NAME) for name, entry in (manifest or {}).items()}
+
+
+def choose_encoding(filename, accept_encoding):
+    """Wybiera najlepszy dostępny wariant pliku. Zwraca (ścieżka, kodowanie lub None)."""
+    accepted = {part.split(';')[0].strip().lower() for part in (accept_encoding or '').split(',')}
+    for encoding, suffix in ENCODINGS:
+        path = os.path.join(DIST_DIR, filename + suffix)
+        if encoding in accepted and os.path.exists(path):
+            return path, encoding
+    return os.path.join(DIST_DIR, filename), None
+
+
+if __name__ == '__main__':
+    for logical_name, item in build().items():
+        sizes = ", ".join(f"{key}: {item[key]} B" for key in ('size', 'gzip', 'br') if key in item)
+        print(f"{logical_name:16} -> static/dist/{item['file']} ({sizes})")
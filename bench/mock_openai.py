@@ -0,0 +1,201 @@
+# --- Atrapa API OpenAI (chat.completions) do testów obciążeniowych ---
+# Lokalny serwer HTTP zgodny z endpointem POST /v1/chat/completions (JSON i stream SSE).
+# Pozwala mierzyć ścieżkę /chat bez kosztów API:
+# * opóźnienie odpowiedzi z rozkładu log-normalnego (mediana + rozrzut),
+# * strumieniowanie tokenów z opóźnieniem między fragmentami,
+# * wstrzykiwane błędy 429 (z Retry-After) i 5xx,
+# * pole usage (tokeny liczone przybliżeniem ~3 znaki/token, jak w context.py).
+# Odpowiedź zawiera [CONSENT], gdy klient wyraża zgodę lub po N wiadomościach klienta.
+# GET /stats zwraca łączne liczniki (zapytania, tokeny, błędy) - używa ich bench/run.py.
+#
+# Uruchomienie samodzielne:  python bench/mock_openai.py --port 8099 --latency-median 0.8
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONSENT_WORDS = ("zgadzam", "zgoda", "tak, możemy", "przejdźmy do kontaktu")
+CLOSING_MARKER = "Klient wyraził zgodę"
+
+REPLIES = (
+    "Świetnie, dziękuję za informacje! Jaki jest główny cel projektu?",
+    "Rozumiem. Czy ma Pan/Pani już stronę internetową lub link, który mogę zobaczyć?",
+    "Dziękuję. Jaki budżet orientacyjnie Państwo przewidują na ten projekt?",
+    "Jasne. W jakim terminie chcieliby Państwo wystartować z projektem?",
+)
+CONSENT_REPLY = ("Dziękuję za wszystkie odpowiedzi. Do przygotowania spersonalizowanej wyceny potrzebujemy "
+                 "zgody na kontakt. [CONSENT]")
+CLOSING_REPLY = ("Dziękujemy za rozmowę! Dane zostały przekazane do zespołu Matyla Design. Skontaktujemy się "
+                 "z Tobą w sprawie spersonalizowanej wyceny w ciągu **24-48 godzin** 🙂")
+
+
+def approx_tokens(text):
+    return max(1, len(text) // 3)
+
+
+class MockState:
+    def __init__(self, args):
+        self.args = args
+        self.lock = threading.Lock()
+        self.counters = {
+            'requests': 0,
+            'streams': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+            'errors_429': 0,
+            'errors_5xx': 0,
+        }
+
+    def count(self, **values):
+        with self.lock:
+            for name, value in values.items():
+                self.counters[name] += value
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counters)
+
+    def latency(self):
+        median = self.args.latency_median
+        if median <= 0:
+            return 0.0
+        return min(self.args.latency_max, random.lognormvariate(0, self.args.latency_sigma) * median)
+
+
+def choose_reply(messages):
+    user_messages = [m.get('content', '') for m in messages if m.get('role') == 'user']
+    last = user_messages[-1] if user_messages else ''
+    if CLOSING_MARKER in last:
+        return CLOSING_REPLY
+    if any(word in last.lower() for word in CONSENT_WORDS) or len(user_messages) >= STATE.args.consent_after:
+        return CONSENT_REPLY
+    return REPLIES[(len(user_messages) - 1) % len(REPLIES)]
+
+
+def split_chunks(text, size=4):
+    words = text.split(' ')
+    for i in range(0, len(words), size):
+        yield ' '.join(words[i:i + size]) + (' ' if i + size < len(words) else '')
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, status, body, headers=None):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/stats':
+            return self._json(200, STATE.snapshot())
+        return self._json(404, {'error': {'message': 'not found'}})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        if not self.path.endswith('/chat/completions'):
+            return self._json(404, {'error': {'message': 'not found'}})
+
+        args = STATE.args
+        STATE.count(requests=1)
+        time.sleep(STATE.latency())
+
+        roll = random.random()
+        if roll < args.error_429:
+            STATE.count(errors_429=1)
+            return self._json(429, {'error': {'message': 'Rate limit reached (mock)', 'type': 'requests',
+                                              'code': 'rate_limit_exceeded'}},
+                              {'retry-after-ms': str(int(args.retry_after * 1000))})
+        if roll < args.error_429 + args.error_5xx:
+            STATE.count(errors_5xx=1)
+            return self._json(random.choice((500, 502, 503)), {'error': {'message': 'Upstream error (mock)',
+                                                                         'type': 'server_error'}})
+
+        messages = body.get('messages', [])
+        reply = choose_reply(messages)
+        usage = {
+            'prompt_tokens': sum(4 + approx_tokens(m.get('content', '')) for m in messages),
+            'completion_tokens': approx_tokens(reply),
+        }
+        usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+        STATE.count(prompt_tokens=usage['prompt_tokens'], completion_tokens=usage['completion_tokens'])
+        model = body.get('model', 'gpt-4o-mini')
+        created = int(time.time())
+
+        if not body.get('stream'):
+            return self._json(200, {
+                'id': 'chatcmpl-mock', 'object': 'chat.completion', 'created': created, 'model': model,
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': reply}}],
+                'usage': usage,
+            })
+
+        STATE.count(streams=1)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        def send(chunk):
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+        base = {'id': 'chatcmpl-mock', 'object': 'chat.completion.chunk', 'created': created, 'model': model}
+        try:
+            for piece in split_chunks(reply):
+                time.sleep(args.token_delay)
+                send(dict(base, choices=[{'index': 0, 'delta': {'content': piece}, 'finish_reason': None}],
+                          usage=None))
+            send(dict(base, choices=[{'index': 0, 'delta': {}, 'finish_reason': 'stop'}], usage=None))
+            if (body.get('stream_options') or {}).get('include_usage'):
+                send(dict(base, choices=[], usage=usage))
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+STATE = None
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Atrapa API OpenAI do testów obciążeniowych')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency-median', type=float, default=0.8, help='mediana opóźnienia odpowiedzi (s)')
+    parser.add_argument('--latency-sigma', type=float, default=0.5, help='rozrzut rozkładu log-normalnego')
+    parser.add_argument('--latency-max', type=float, default=20.0, help='maksymalne opóźnienie (s)')
+    parser.add_argument('--token-delay', type=float, default=0.02, help='opóźnienie między fragmentami strumienia (s)')
+    parser.add_argument('--error-429', type=float, default=0.0, help='odsetek odpowiedzi 429 (0-1)')
+    parser.add_argument('--error-5xx', type=float, default=0.0, help='odsetek odpowiedzi 5xx (0-1)')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Retry-After dla 429 (s)')
+    parser.add_argument('--consent-after', type=int, default=6, help='[CONSENT] po tylu wiadomościach klienta')
+    return parser
+
+
+def create_server(args):
+    global STATE
+    STATE = MockState(args)
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == '__main__':
+    arguments = build_parser().parse_args()
+    mock = create_server(arguments)
+    print(f"Mock OpenAI: http://{arguments.host}:{mock.server_address[1]}/v1")
+    mock.serve_forever()
@@ -0,0 +1,378 @@
+# --- Test Obciążeniowy Ścieżki /chat ---
+# Uruchamia atrapę OpenAI (bench/mock_openai.py) i aplikację pod gunicornem
+# (gunicorn.conf.py, OPENAI_BASE_URL wskazuje na atrapę), a następnie prowadzi równolegle
+# wieloturowe rozmowy z bench/scenarios.py aż do [CONSENT], przekazania leada
+# i wiadomości kończącej. Wynik jest zapisywany jako JSON (porównywalny między commitami).
+#
+# Każda rozmowa wychodzi z innego adresu 127.x.y.z (cała sieć 127.0.0.0/8 to loopback
+# w Linuksie), więc limity per IP działają jak dla prawdziwych odwiedzających.
+#
+# Przykład:
+#   python bench/run.py --conversations 200 --concurrency 50 --workers 2 --output bench/results/HEAD.json
+#   python bench/run.py --compare bench/results/main.json --output bench/results/HEAD.json
+import argparse
+import http.client
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import mock_openai  # noqa: E402
+from scenarios import LEAD, SCENARIOS, consent_summary  # noqa: E402
+
+
+def percentile(values, q):
+    """Percentyl metodą najbliższej rangi (nearest-rank)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return round(ordered[index], 1)
+
+
+def summarize(values):
+    if not values:
+        return {}
+    return {
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'p99': percentile(values, 99),
+        'mean': round(statistics.fmean(values), 1),
+        'max': round(max(values), 1),
+    }
+
+
+def source_address(index):
+    # 127.10.0.2, 127.10.0.3, ... - osobny "odwiedzający" dla każdej rozmowy
+    return f"127.10.{(index // 250) % 256}.{index % 250 + 2}"
+
+
+class Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.ttft = []
+        self.statuses = {}
+        self.requests = 0
+        self.consent_reached = 0
+        self.completed = 0
+        self.turns = []
+
+    def record(self, status, latency_ms, ttft_ms=None):
+        with self.lock:
+            self.requests += 1
+            self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+            if status == 200:
+                self.latencies.append(latency_ms)
+                if ttft_ms is not None:
+                    self.ttft.append(ttft_ms)
+
+
+class Conversation:
+    """Jedna rozmowa odwiedzającego: kolejne tury /chat, formularz zgody, wiadomość kończąca."""
+
+    def __init__(self, index, host, port, stream, results, think_time):
+        self.index = index
+        self.scenario = list(SCENARIOS)[index % len(SCENARIOS)]
+        self.host = host
+        self.port = port
+        self.stream = stream
+        self.results = results
+        self.think_time = think_time
+        self.session_id = None
+        self.transcript_token = None
+
+    def _connect(self):
+        return http.client.HTTPConnection(self.host, self.port, timeout=120,
+                                          source_address=(source_address(self.index), 0))
+
+    def _post(self, path, body, stream=False):
+        """Zwraca (status, dane odpowiedzi, czas do pierwszego fragmentu w ms lub None)."""
+        conn = self._connect()
+        headers = {'Content-Type': 'application/json'}
+        if stream:
+            headers['Accept'] = 'text/event-stream'
+        started = time.perf_counter()
+        try:
+            conn.request('POST', path, body=json.dumps(body), headers=headers)
+            response = conn.getresponse()
+            if not (stream and response.status == 200
+                    and response.getheader('Content-Type', '').startswith('text/event-stream')):
+                raw = response.read()
+                data = json.loads(raw) if raw else {}
+                return response.status, data, None, (time.perf_counter() - started) * 1000
+            ttft_ms = None
+            event = None
+            data = {}
+            for line in response:
+                line = line.decode('utf-8').rstrip('\n')
+                if line.startswith('event: '):
+                    event = line[len('event: '):]
+                elif line.startswith('data: '):
+                    payload = json.loads(line[len('data: '):])
+                    if 'delta' in payload and ttft_ms is None:
+                        ttft_ms = (time.perf_counter() - started) * 1000
+                    if event == 'done':
+                        data = payload
+                    elif event == 'error':
+                        return 502, payload, ttft_ms, (time.perf_counter() - started) * 1000
+                elif not line:
+                    event = None
+            return response.status, data, ttft_ms, (time.perf_counter() - started) * 1000
+        finally:
+            conn.close()
+
+    def _chat(self, message, stream):
+        body = {'message': message, 'session_id': self.session_id, 'stream': stream}
+        status, data, ttft_ms, latency_ms = self._post('/chat', body, stream=stream)
+        self.results.record(status, latency_ms, ttft_ms)
+        if status == 200:
+            self.session_id = data.get('session_id', self.session_id)
+            self.transcript_token = data.get('transcript_token', self.transcript_token)
+        return status, data
+
+    def run(self):
+        turns = 0
+        consent = False
+        for message in SCENARIOS[self.scenario]:
+            status, data = self._chat(message, self.stream)
+            turns += 1
+            if status != 200:
+                continue
+            if data.get('consent') or '[CONSENT]' in data.get('response', ''):
+                consent = True
+                break
+            if self.think_time:
+                time.sleep(self.think_time)
+
+        completed = False
+        if consent:
+            status, _, _, latency_ms = self._post('/chat/lead', dict(
+                LEAD, session_id=self.session_id, transcript_token=self.transcript_token, consent=True))
+            self.results.record(status, latency_ms)
+            if status == 202:
+                # Widżet wysyła wiadomość kończącą zwykłym zapytaniem JSON (bez strumienia)
+                status, _ = self._chat(consent_summary(LEAD), stream=False)
+                turns += 1
+                completed = status == 200
+
+        with self.results.lock:
+            self.results.turns.append(turns)
+            self.results.consent_reached += int(consent)
+            self.results.completed += int(completed)
+
+
+def worker_pids(master_pid):
+    pids = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == master_pid:
+            pids.append(int(entry))
+    return pids
+
+
+def rss_kb(pids):
+    total = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+        except OSError:
+            continue
+    return total
+
+
+def start_app(args, mock_url, workdir):
+    env = dict(
+        os.environ,
+        PORT=str(args.port),
+        WEB_CONCURRENCY=str(args.workers),
+        GUNICORN_WORKER_CLASS=args.worker_class,
+        OPENAI_API_KEY='sk-bench',
+        OPENAI_BASE_URL=mock_url,
+        SESSION_DB_PATH=os.path.join(workdir, 'sessions.db'),
+        LEAD_QUEUE_PATH=os.path.join(workdir, 'leads.db'),
+        RATE_LIMIT_DB_PATH=os.path.join(workdir, 'ratelimit.db'),
+        LOG_FILE=os.path.join(workdir, 'app.{pid}.log'),
+        LEAD_SINK_URL='',
+        OPENAI_TOKENS_PER_MINUTE=str(args.tokens_per_minute),
+    )
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'app:app', '-c', 'gunicorn.conf.py'],
+        cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=open(os.path.join(workdir, 'gunicorn.err'), 'w')
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn zakończył działanie (kod {process.returncode}), log: {workdir}/gunicorn.err")
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{args.port}/', timeout=2) as response:
+                if response.status == 200:
+                    return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('Aplikacja nie wystartowała w ciągu 30 s')
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(args):
+    mock = mock_openai.create_server(args.mock)
+    mock_url = f'http://127.0.0.1:{mock.server_address[1]}/v1'
+    threading.Thread(target=mock.serve_forever, daemon=True).start()
+
+    workdir = tempfile.mkdtemp(prefix='chat-bench-')
+    process = start_app(args, mock_url, workdir)
+    try:
+        pids = worker_pids(process.pid)
+        rss_before = rss_kb(pids)
+        results = Results()
+        modes = {'stream': [True], 'json': [False], 'mixed': [True, False]}[args.mode]
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            conversations = [
+                Conversation(i, '127.0.0.1', args.port, modes[i % len(modes)], results, args.think_time)
+                for i in range(args.conversations)
+            ]
+            for future in [pool.submit(conversation.run) for conversation in conversations]:
+                future.result()
+        duration = time.perf_counter() - started
+
+        rss_after = rss_kb(pids)
+        upstream = mock_openai.STATE.snapshot()
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        mock.shutdown()
+
+    conversations = max(1, args.conversations)
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'config': {
+            'conversations': args.conversations,
+            'concurrency': args.concurrency,
+            'workers': args.workers,
+            'worker_class': args.worker_class,
+            'mode': args.mode,
+            'think_time': args.think_time,
+            'mock': vars(args.mock),
+        },
+        'results': {
+            'duration_s': round(duration, 2),
+            'requests': results.requests,
+            'throughput_rps': round(results.requests / duration, 2),
+            'conversations_per_s': round(args.conversations / duration, 3),
+            'statuses': results.statuses,
+            'consent_reached': results.consent_reached,
+            'completed': results.completed,
+            'turns_per_conversation': round(statistics.fmean(results.turns), 2) if results.turns else 0,
+            'latency_ms': summarize(results.latencies),
+            'ttft_ms': summarize(results.ttft),
+            'tokens_per_conversation': {
+                'prompt': round(upstream['prompt_tokens'] / conversations, 1),
+                'completion': round(upstream['completion_tokens'] / conversations, 1),
+                'total': round((upstream['prompt_tokens'] + upstream['completion_tokens']) / conversations, 1),
+            },
+            'upstream': upstream,
+            'memory': {
+                'workers_rss_before_kb': rss_before,
+                'workers_rss_after_kb': rss_after,
+                'per_session_bytes': round(max(0, rss_after - rss_before) * 1024 / conversations),
+            },
+        },
+    }
+
+
+# Metryki porównywane z raportem bazowym: (ścieżka, True = mniejsza wartość jest lepsza)
+COMPARED = (
+    (('throughput_rps',), False),
+    (('latency_ms', 'p50'), True),
+    (('latency_ms', 'p95'), True),
+    (('latency_ms', 'p99'), True),
+    (('ttft_ms', 'p50'), True),
+    (('ttft_ms', 'p95'), True),
+    (('tokens_per_conversation', 'total'), True),
+    (('memory', 'per_session_bytes'), True),
+)
+
+
+def compare(report, baseline):
+    lines = [f"Porównanie z {baseline.get('commit')} ({baseline.get('timestamp')}):"]
+    for path, lower_is_better in COMPARED:
+        current, previous = report['results'], baseline['results']
+        for key in path:
+            current = (current or {}).get(key)
+            previous = (previous or {}).get(key)
+        if not current or not previous:
+            continue
+        change = (current - previous) / previous * 100
+        worse = change > 0 if lower_is_better else change < 0
+        marker = '  <-- gorzej' if worse and abs(change) >= 10 else ''
+        lines.append(f"  {'.'.join(path):32} {previous:>12} -> {current:<12} ({change:+.1f}%){marker}")
+    return "\n".join(lines)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Test obciążeniowy /chat z atrapą OpenAI')
+    parser.add_argument('--conversations', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--worker-class', default='gevent')
+    parser.add_argument('--mode', choices=('stream', 'json', 'mixed'), default='stream')
+    parser.add_argument('--think-time', type=float, default=0.0, help='przerwa między turami rozmowy (s)')
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--tokens-per-minute', type=int, default=0, help='OPENAI_TOKENS_PER_MINUTE (0 = bez limitu)')
+    parser.add_argument('--output', help='plik JSON z wynikiem')
+    parser.add_argument('--compare', help='raport bazowy JSON do porównania')
+    return parser
+
+
+def main():
+    parser = build_parser()
+    args, rest = parser.parse_known_args()
+    # Pozostałe argumenty konfigurują atrapę OpenAI (np. --latency-median 0.5 --error-429 0.05)
+    args.mock = mock_openai.build_parser().parse_args(['--port', '0'] + rest)
+
+    report = run_benchmark(args)
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    print(output)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print(compare(report, json.load(f)), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+# --- Scenariusze Rozmów do Testów Obciążeniowych ---
+# Wieloturowe skrypty zgodne ze scenariuszami pre-kwalifikacyjnymi z prompt.py
+# (WWW, Marketing, AI, Branding, Audyt). Każda rozmowa kończy się zgodą na kontakt
+# ([CONSENT]), przekazaniem leada i wiadomością podsumowującą wysyłaną przez widżet.
+
+SCENARIOS = {
+    "www": [
+        "Dzień dobry, potrzebuję nowej strony internetowej dla mojej firmy.",
+        "Prowadzimy biuro rachunkowe w Poznaniu, obsługujemy małe firmy.",
+        "Mamy starą stronę na WordPressie: www.biuro-przyklad.pl",
+        "Chodzi głównie o pozyskiwanie nowych klientów przez formularz kontaktowy.",
+        "Budżet to około 6-8 tysięcy złotych.",
+        "Chcielibyśmy wystartować w ciągu dwóch miesięcy.",
+        "Tak, zgadzam się na kontakt.",
+    ],
+    "marketing": [
+        "Cześć, interesuje mnie kampania Google Ads i reklamy na Facebooku.",
+        "Sprzedajemy kosmetyki naturalne w sklepie internetowym.",
+        "Do tej pory robiliśmy tylko posty organiczne na Instagramie.",
+        "Miesięcznie moglibyśmy przeznaczyć 3 tysiące na reklamy.",
+        "Najważniejsza jest dla nas sprzedaż, nie zasięgi.",
+        "Tak, zgadzam się, możemy przejść do kontaktu.",
+    ],
+    "ai": [
+        "Czy robicie chatboty AI na stronę?",
+        "Chcemy automatyzacji obsługi klienta w naszym serwisie rowerowym.",
+        "Najczęściej klienci pytają o terminy napraw i ceny części.",
+        "Dziennie mamy około 50 zapytań przez stronę i Messengera.",
+        "Zależy nam na integracji z kalendarzem rezerwacji.",
+        "Zgadzam się na kontakt.",
+    ],
+    "branding": [
+        "Dzień dobry, zakładam firmę i potrzebuję logo oraz identyfikacji wizualnej.",
+        "To będzie kawiarnia specialty w centrum Wrocławia.",
+        "Chcemy, żeby marka była nowoczesna, ale ciepła.",
+        "Nie mamy jeszcze żadnych materiałów, zaczynamy od zera.",
+        "Przydałaby się też księga znaku.",
+        "Budżet około 5 tysięcy złotych.",
+        "Tak, zgadzam się na kontakt w sprawie wyceny.",
+    ],
+    "audyt": [
+        "Chcę założyć nową firmę, zrobić stronę i zająć się marketingiem - potrzebuję wszystkiego.",
+        "Tak, audyt brzmi dobrze.",
+        "Branża to usługi remontowe, działamy w Trójmieście.",
+        "Strony jeszcze nie mamy.",
+        "Konkurencja jest mocna w Google, chcemy się wyróżnić.",
+        "Zgadzam się na kontakt.",
+    ],
+}
+
+LEAD = {"name": "Test Benchmark", "email": "bench@example.com", "phone": "500 000 000"}
+
+
+def consent_summary(lead):
+    """Wiadomość kończąca wysyłana przez widżet po formularzu zgody (static/js/chat-widget.js)."""
+    return (
+        f"Klient wyraził zgodę i wysłał dane: Imię: {lead['name']}, Email: {lead['email']}, "
+        f"Telefon: {lead['phone'] or 'Brak'}.\n"
+        "            PROŚBA O WYSŁANIE FINALNEJ WIADOMOŚCI KOŃCZĄCEJ ROZMOWĘ I DZIĘKOWANIE (Zgodnie z SYSTEM PROMPT)."
+    )
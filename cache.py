@@ -0,0 +1,133 @@
+# --- Cache Odpowiedzi (pierwsze wiadomości i pytania typu FAQ) ---
+# Duża część rozmów zaczyna się od niemal identycznych wiadomości ("ile kosztuje strona?",
+# "chcę logo"), na które system prompt wymusza praktycznie stałą odpowiedź. Cache stoi
+# przed wywołaniem OpenAI: trafienie zwraca odpowiedź w milisekundach i bez kosztu tokenów.
+# Klucz = wersja promptu + skrót dotychczasowej historii + znormalizowana wiadomość.
+# Cache jest per proces (każdy worker gunicorna ma własny). Wersja promptu (prompt.PROMPT_VERSION)
+# jest częścią klucza, więc odpowiedzi wygenerowane dla innej treści promptu nigdy nie są zwracane.
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from prompt import normalize_text
+
+NON_WORD_PATTERN = re.compile(r"[^\w]+")
+
+
+def normalize_message(text):
+    """Małe litery, bez polskich znaków, interpunkcji i nadmiarowych spacji."""
+    return " ".join(NON_WORD_PATTERN.sub(" ", normalize_text(text)).split())
+
+
+def history_hash(history):
+    """Skrót dotychczasowej historii rozmowy (pusty dla pierwszej wiadomości)."""
+    if not history:
+        return ""
+    payload = json.dumps([(m.get("role"), m.get("content")) for m in history], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class ResponseCache:
+    """
+    LRU z TTL dla odpowiedzi modelu.
+    Wyszukiwanie: najpierw dokładne dopasowanie, opcjonalnie (similarity > 0) najbardziej
+    podobna wiadomość z tym samym prefiksem historii (podobieństwo Jaccarda słów).
+    """
+
+    def __init__(self, prompt_version, max_entries=1000, ttl=3600, similarity=0.0, max_history_messages=0):
+        self.prompt_version = prompt_version
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self.max_history_messages = max_history_messages
+        self._entries = OrderedDict()  # (wersja promptu:prefix, message) -> (response, created_at, words)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    def eligible(self, history):
+        """Cache obejmuje tylko początek rozmowy (domyślnie pierwszą wiadomość)."""
+        return self.max_entries > 0 and len(history) <= self.max_history_messages
+
+    def _prefix(self, history):
+        return f"{self.prompt_version}:{history_hash(history)}"
+
+    def get(self, message, history):
+        if not self.eligible(history):
+            return None
+        prefix = self._prefix(history)
+        normalized = normalize_message(message)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get((prefix, normalized))
+            if entry is not None and now - entry[1] < self.ttl:
+                self._entries.move_to_end((prefix, normalized))
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[(prefix, normalized)]
+
+            if self.similarity > 0:
+                words = set(normalized.split())
+                best, best_score = None, self.similarity
+                for (entry_prefix, _), (response, created_at, entry_words) in self._entries.items():
+                    if entry_prefix != prefix or now - created_at >= self.ttl:
+                        continue
+                    score = jaccard(words, entry_words)
+                    if score >= best_score:
+                        best, best_score = response, score
+                if best is not None:
+                    self.hits += 1
+                    self.similar_hits += 1
+                    return best
+
+            self.misses += 1
+            return None
+
+    def put(self, message, history, response):
+        if not self.eligible(history):
+            return
+        # Odpowiedzi otwierające formularz zgody zależą od przebiegu rozmowy - nie cache'ujemy ich
+        normalized = normalize_message(message)
+        if not normalized or "[CONSENT]" in response:
+            return
+        key = (self._prefix(history), normalized)
+        with self._lock:
+            self._entries[key] = (response, time.time(), set(normalized.split()))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "prompt_version": self.prompt_version,
+            }
+
+
+def create_response_cache(prompt_version):
+    """Tworzy cache odpowiedzi na podstawie zmiennych środowiskowych (RESPONSE_CACHE_SIZE=0 wyłącza)."""
+    return ResponseCache(
+        prompt_version,
+        max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", 1000)),
+        ttl=int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 3600)),
+        similarity=float(os.getenv("RESPONSE_CACHE_SIMILARITY", 0)),
+        max_history_messages=int(os.getenv("RESPONSE_CACHE_MAX_HISTORY", 0)),
+    )
@@ -0,0 +1,134 @@
+# --- Zarządzanie Kontekstem Rozmowy (budżet tokenów) ---
+# Do OpenAI wysyłamy system prompt, ostatnie N tur rozmowy dosłownie oraz zwięzłe
+# podsumowanie starszej części. Podsumowanie jest budowane lokalnie (bez dodatkowego
+# zapytania do modelu) i zachowuje fakty, na których opierają się scenariusze
+# pre-kwalifikacyjne: odpowiedzi klienta, podane linki i zadane już pytania.
+import os
+import re
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")  # kodowanie gpt-4o / gpt-4o-mini
+except Exception:  # brak biblioteki lub pliku kodowania - używamy estymatora
+    _encoding = None
+
+# Budżet tokenów dla historii (bez system promptu) i liczba tur zachowywanych dosłownie
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", 1500))
+CONTEXT_KEEP_TURNS = int(os.getenv("CONTEXT_KEEP_TURNS", 4))
+
+# Narzut formatu czatu na każdą wiadomość (rola, separatory)
+MESSAGE_TOKEN_OVERHEAD = 4
+# Maksymalna długość pojedynczej odpowiedzi klienta w podsumowaniu (znaki)
+SUMMARY_ANSWER_CHARS = 300
+
+URL_PATTERN = re.compile(r'(?:https?://|www\.)\S+|\b[\w-]+(?:\.[\w-]+)*\.(?:pl|com|eu|net|org|io|shop|store)\b\S*', re.IGNORECASE)
+QUESTION_PATTERN = re.compile(r'[^.!?\n]*\?')
+
+SUMMARY_HEADER = (
+    "PODSUMOWANIE WCZEŚNIEJSZEJ CZĘŚCI ROZMOWY (te informacje zostały już zebrane - "
+    "nie pytaj o nie ponownie i licz je jako udzielone odpowiedzi):"
+)
+
+
+def count_tokens(text):
+    """Liczba tokenów tekstu (tiktoken lub przybliżenie ~3 znaki/token dla polskiego)."""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return max(1, len(text) // 3)
+
+
+def count_message_tokens(messages):
+    return sum(MESSAGE_TOKEN_OVERHEAD + count_tokens(m.get("content", "")) for m in messages)
+
+
+def summarize_messages(messages):
+    """
+    Ekstrakcyjne podsumowanie fragmentu rozmowy.
+    Zachowuje odpowiedzi klienta (skrócone), pytania zadane przez asystenta i linki.
+    """
+    lines = []
+    for message in messages:
+        content = message.get("content", "").strip()
+        if not content:
+            continue
+        if message.get("role") == "user":
+            answer = " ".join(content.split())
+            if len(answer) > SUMMARY_ANSWER_CHARS:
+                answer = answer[:SUMMARY_ANSWER_CHARS].rstrip() + "…"
+            lines.append(f"- Klient: {answer}")
+        else:
+            questions = [q.strip() for q in QUESTION_PATTERN.findall(content) if q.strip()]
+            if questions:
+                lines.append(f"- Asystent zapytał: {' '.join(questions)}")
+            if "[CONSENT]" in content:
+                lines.append("- Asystent wyświetlił już formularz zgody [CONSENT].")
+    return lines
+
+
+def extract_links(text):
+    return [link.rstrip(".,;:!?)") for link in URL_PATTERN.findall(text)]
+
+
+def merge_summary(summary, messages):
+    """Dokleja podsumowanie kolejnych wiadomości do bieżącego podsumowania sesji."""
+    lines = [line for line in summary.splitlines() if line.startswith("- ")] if summary else []
+    links = []
+    for line in summary.splitlines() if summary else []:
+        if line.startswith("Linki podane w rozmowie: "):
+            links = line[len("Linki podane w rozmowie: "):].split(", ")
+    lines.extend(summarize_messages(messages))
+    for message in messages:
+        if message.get("role") == "user":
+            for link in extract_links(message.get("content", "")):
+                if link not in links:
+                    links.append(link)
+
+    parts = [SUMMARY_HEADER] + lines
+    if links:
+        parts.append("Linki podane w rozmowie: " + ", ".join(links))
+    return "\n".join(parts)
+
+
+def build_context(system_prompt, session, user_entry, system_tokens=None, baseline_system_tokens=None):
+    """
+    Buduje listę wiadomości dla OpenAI w ramach budżetu tokenów.
+    Gdy historia od ostatniego podsumowania przekracza HISTORY_TOKEN_BUDGET, starsze tury
+    (poza ostatnimi CONTEXT_KEEP_TURNS) są przenoszone do podsumowania sesji.
+    'system_tokens' / 'baseline_system_tokens' pozwalają podać policzone wcześniej tokeny
+    wysyłanego i pełnego system promptu (punkt odniesienia dla oszczędności).
+    Zwraca (wiadomości, statystyki tokenów).
+    """
+    keep_messages = CONTEXT_KEEP_TURNS * 2
+    recent = session.history[session.summarized:]
+    if len(recent) > keep_messages and count_message_tokens(recent) > HISTORY_TOKEN_BUDGET:
+        folded = recent[:len(recent) - keep_messages]
+        session.summary = merge_summary(session.summary, folded)
+        session.summarized += len(folded)
+        recent = recent[len(folded):]
+
+    messages = [{"role": "system", "content": system_prompt}]
+    if session.summary:
+        messages.append({"role": "system", "content": session.summary})
+    messages.extend(recent)
+    messages.append(user_entry)
+
+    if system_tokens is None:
+        system_tokens = count_tokens(system_prompt)
+    if baseline_system_tokens is None:
+        baseline_system_tokens = system_tokens
+    prompt_tokens = system_tokens + count_message_tokens(messages[1:]) + MESSAGE_TOKEN_OVERHEAD
+    full_tokens = baseline_system_tokens + count_message_tokens(session.history + [user_entry]) + MESSAGE_TOKEN_OVERHEAD
+    stats = {
+        "tokens": prompt_tokens,
+        "full_tokens": full_tokens,
+        "saved_tokens": max(0, full_tokens - prompt_tokens),
+    }
+    return messages, stats
+
+
+def format_context_stats(stats):
+    """Fragment linii logu REQUEST SUCCESS z oszczędnością tokenów w tej turze."""
+    scenarios = ",".join(stats.get("scenarios") or []) or "-"
+    return f"Scenariusz: {scenarios} | Kontekst: {stats['tokens']}/{stats['full_tokens']} (oszczędność: {stats['saved_tokens']})"
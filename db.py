@@ -0,0 +1,45 @@
+# --- Wspólne Połączenie SQLite (jedno na plik i proces) ---
+# Sesje (sessions.py), liczniki limitów (ratelimit.py) i kolejka leadów (leads.py) korzystają
+# z jednego połączenia na plik w każdym procesie, używanego pod blokadą. Połączenie per wątek
+# (threading.local) pod workerem gevent oznaczało połączenie per greenlet, czyli nowe
+# połączenie i ponowne PRAGMA przy każdym zapytaniu. Zapytania są krótkie (po kluczu),
+# więc kolejkowanie w obrębie procesu nie ogranicza przepustowości; między procesami
+# synchronizuje SQLite (WAL + busy timeout).
+import os
+import sqlite3
+import threading
+
+
+class SharedConnection:
+    """
+    Połączenie SQLite współdzielone przez wątki i greenlety procesu (tryb autocommit).
+    Użycie: `with db as conn:` - blokada obejmuje cały blok, więc transakcja
+    BEGIN ... COMMIT w bloku nie przeplata się z innymi zapytaniami.
+    """
+
+    def __init__(self, path, synchronous='NORMAL', timeout=5.0):
+        self.path = path
+        self.synchronous = synchronous
+        self.timeout = timeout
+        self._lock = threading.RLock()
+        self._conn = None
+        self._pid = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        try:
+            # Po fork() (np. preload_app w gunicornie) proces potomny otwiera własne połączenie
+            if self._conn is None or self._pid != os.getpid():
+                conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                       check_same_thread=False)
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute(f'PRAGMA synchronous={self.synchronous}')
+                self._conn, self._pid = conn, os.getpid()
+        except Exception:
+            self._lock.release()
+            raise
+        return self._conn
+
+    def __exit__(self, *exc_info):
+        self._lock.release()
+        return False
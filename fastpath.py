@@ -0,0 +1,109 @@
+# --- Stan Rozmowy i Odpowiedzi Skryptowe (bez zapytania do OpenAI) ---
+# Część tur ma w system prompcie narzuconą treść odpowiedzi. Takie tury obsługujemy
+# lokalnie na podstawie stanu rozmowy (scenariusz + etap zgody), a wszystkie pozostałe
+# trafiają do modelu. Reguły są celowo zachowawcze: w razie wątpliwości odpowiada model.
+# * Zasada 11 - zakończenie po zgodzie: wiadomość podsumowująca z formularza widżetu
+#   ("Klient wyraził zgodę i wysłał dane: ...") po wyświetleniu formularza [CONSENT],
+# * Zasada 12 - zakończenie bez zgody: wyraźna odmowa w bezpośredniej odpowiedzi na pytanie
+#   o zgodę lub formularz (odmowa po innym pytaniu może oznaczać powrót do pytań - Zasada 14),
+# * Zasada 13 - pytanie niezwiązane z agencją (wąska lista oczywistych tematów).
+# Stan jest wyliczany z historii sesji, więc działa tak samo dla każdego backendu sesji.
+import re
+
+from prompt import SCENARIO_PATTERNS, detect_scenarios, normalize_text
+
+CONSENT_TAG = "[CONSENT]"
+
+# Etapy rozmowy
+PHASE_QUALIFYING = "qualifying"          # zbieranie odpowiedzi ze scenariusza
+PHASE_CONSENT_ASKED = "consent_asked"    # asystent zapytał o zgodę na kontakt (Zasada 14)
+PHASE_FORM_SHOWN = "form_shown"          # wyświetlony formularz [CONSENT]
+PHASE_CLOSED = "closed"                  # rozmowa zakończona (Zasada 11 lub 12)
+
+# Wiadomość wysyłana przez widżet po wypełnieniu formularza (static/js/chat-widget.js)
+CONSENT_SUMMARY_PREFIX = "klient wyrazil zgode i wyslal dane"
+# Pytanie o zgodę z Zasady 14 (po normalizacji)
+CONSENT_QUESTION = re.compile(r"mozemy przejsc do kontaktu|zgod\w* na kontakt")
+
+# Teksty odpowiedzi (Zasady 11-13 z prompt.py)
+CLOSING_AFTER_CONSENT = ("Dziękujemy za rozmowę! Dane zostały przekazane do zespołu Matyla Design. "
+                         "Skontaktujemy się z Tobą w sprawie spersonalizowanej wyceny w ciągu **24-48 godzin** 🙂")
+CLOSING_WITHOUT_CONSENT = ("Rozumiem, nie ma problemu. Jeśli zmienisz zdanie, możesz skontaktować się z nami "
+                           "bezpośrednio: kontakt@matyladesign.pl lub 881 622 882. Dziękujemy za rozmowę!")
+OFF_TOPIC_REPLY = ("Zajmuję się wyłącznie tematami związanymi z Matyla Design - stronami WWW, marketingiem, "
+                   "automatyzacją AI i brandingiem. W czym mogę Ci pomóc w tym zakresie?")
+
+# Wyraźna odmowa zgody / podania danych (cała wiadomość, po normalizacji)
+REFUSAL_PATTERN = re.compile(
+    r"^(nie,? ?(dziekuje|dzieki)|nie zgadzam sie|nie wyrazam zgody|nie chce (podawac|zostawiac) "
+    r"(danych|kontaktu)|nie chce kontaktu|rezygnuje|bez kontaktu|bez formularza)[\s.!,]*$"
+)
+# Oczywiste tematy spoza oferty agencji (Zasada 13)
+OFF_TOPIC_PATTERNS = [re.compile(pattern) for pattern in (
+    r"\bpogod[aeyz]\b",
+    r"\bprzepis na\b",
+    r"\b(opowiedz|powiedz|znasz)\b.*\b(zart|dowcip|kawal)",
+    r"\bhoroskop",
+    r"\bkto wygral\b|\bwynik meczu\b",
+    r"\bnapisz (mi )?(wiersz|wypracowanie|piosenke)",
+    r"\bstolica\b",
+)]
+# Słowa wskazujące na temat związany z agencją - wtedy zawsze odpowiada model
+AGENCY_PATTERN = re.compile(r"matyla|agencj|ofert|wycen|projekt|firm|uslug|klient|sprzedaz|biznes|\bmark[aeiy]?\b|kontakt")
+MAX_SCRIPTED_MESSAGE_CHARS = 200
+
+
+def message_phase(content):
+    """Etap rozmowy wyznaczony przez jedną wiadomość asystenta."""
+    if content == CLOSING_AFTER_CONSENT or content == CLOSING_WITHOUT_CONSENT:
+        return PHASE_CLOSED
+    if CONSENT_TAG in content:
+        return PHASE_FORM_SHOWN
+    if CONSENT_QUESTION.search(normalize_text(content)):
+        return PHASE_CONSENT_ASKED
+    return PHASE_QUALIFYING
+
+
+def conversation_state(history):
+    """
+    Scenariusze i etap rozmowy wyliczone z historii sesji.
+    Etap wynika z OSTATNIEJ wiadomości asystenta - po pytaniu o zgodę rozmowa może wrócić
+    do pytań kwalifikujących. 'consent_form' oznacza, że formularz zgody był już wyświetlony.
+    """
+    phase = PHASE_QUALIFYING
+    consent_form = False
+    for message in history:
+        if message.get("role") != "assistant":
+            continue
+        phase = message_phase(message.get("content", ""))
+        if phase == PHASE_FORM_SHOWN:
+            consent_form = True
+        elif phase == PHASE_CLOSED:
+            consent_form = False
+    return {"scenarios": detect_scenarios(history), "phase": phase, "consent_form": consent_form}
+
+
+def is_off_topic(text):
+    if AGENCY_PATTERN.search(text) or any(pattern.search(text) for pattern in SCENARIO_PATTERNS.values()):
+        return False
+    return any(pattern.search(text) for pattern in OFF_TOPIC_PATTERNS)
+
+
+def scripted_reply(history, message):
+    """
+    Odpowiedź skryptowa dla tury lub None (turę obsługuje model).
+    Zwraca (reguła, treść odpowiedzi, stan rozmowy).
+    """
+    state = conversation_state(history)
+    text = normalize_text(" ".join(message.split()))
+
+    # Podsumowanie wysyła formularz widżetu - także gdy po [CONSENT] padły jeszcze inne pytania
+    if state["consent_form"] and text.startswith(CONSENT_SUMMARY_PREFIX):
+        return "rule_11", CLOSING_AFTER_CONSENT, state
+    if len(text) > MAX_SCRIPTED_MESSAGE_CHARS:
+        return None
+    if state["phase"] in (PHASE_CONSENT_ASKED, PHASE_FORM_SHOWN) and REFUSAL_PATTERN.match(text):
+        return "rule_12", CLOSING_WITHOUT_CONSENT, state
+    if is_off_topic(text):
+        return "rule_13", OFF_TOPIC_REPLY, state
+    return None
@@ -0,0 +1,23 @@
+# --- Konfiguracja Gunicorn (wczytywana automatycznie z katalogu projektu) ---
+# Worker gevent: oczekiwanie na OpenAI, strumienie SSE i opóźnienia retry (time.sleep)
+# nie blokują workera - jeden proces obsługuje setki równoczesnych rozmów,
+# a CPU przez większość czasu pozostaje bezczynne.
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5001)}"
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gevent")
+workers = int(os.environ.get("WEB_CONCURRENCY", min(multiprocessing.cpu_count(), 4)))
+# Sesje tylko w pamięci procesu (pusty SESSION_DB_PATH) działają wyłącznie z jednym workerem
+if workers > 1 and not os.environ.get("SESSION_DB_PATH", "sessions.db").strip():
+    raise RuntimeError("SESSION_DB_PATH jest pusty - przy WEB_CONCURRENCY > 1 sesje muszą być współdzielone")
+# Maksymalna liczba równoczesnych połączeń na worker (rozmowy w toku)
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 1000))
+# Strumienie SSE mogą trwać dłużej niż domyślne 30 s
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+graceful_timeout = 30
+keepalive = 5
+
+# Każdy worker pisze log do własnego pliku (app.<pid>.log) - rotacja plików nie koliduje między procesami
+if workers > 1:
+    os.environ.setdefault("LOG_FILE", "app.{pid}.log")
@@ -0,0 +1,227 @@
+# --- Przekazywanie Leadów (trwała kolejka + wysyłka w tle) ---
+# Dane z formularza zgody trafiają najpierw do lokalnej kolejki SQLite (zapis trwały,
+# tylko dopisywanie), a zapytanie widżetu kończy się zaraz po zapisie. Wątek w tle
+# wysyła leady partiami do skonfigurowanego endpointu HTTP (np. wtyczki WordPress)
+# z ponawianiem i kluczem idempotencji - zerwane połączenie klienta nie gubi leada.
+# Kolejka jest bezpieczna dla wielu workerów: partie są "dzierżawione" na czas wysyłki.
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from db import SharedConnection
+
+logger = logging.getLogger(__name__)
+
+
+class LeadQueue:
+    """Trwała kolejka leadów w SQLite (tryb WAL)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.db = SharedConnection(path, synchronous='FULL')  # lead nie może zginąć po potwierdzeniu zapisu
+        with self.db as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS leads ('
+                ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+                ' idempotency_key TEXT NOT NULL UNIQUE,'
+                ' payload TEXT NOT NULL,'
+                ' created_at REAL NOT NULL,'
+                ' attempts INTEGER NOT NULL DEFAULT 0,'
+                ' next_attempt_at REAL NOT NULL DEFAULT 0,'
+                ' lease_until REAL NOT NULL DEFAULT 0,'
+                ' delivered_at REAL,'
+                ' failed_at REAL,'
+                ' last_error TEXT)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_leads_pending ON leads(delivered_at, failed_at, next_attempt_at)')
+
+    def enqueue(self, idempotency_key, payload):
+        """Dodaje lead do kolejki. Ponowne zgłoszenie z tym samym kluczem jest ignorowane."""
+        data = json.dumps(payload, ensure_ascii=False)
+        with self.db as conn:
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO leads (idempotency_key, payload, created_at) VALUES (?, ?, ?)',
+                (idempotency_key, data, time.time())
+            )
+        return cursor.rowcount == 1
+
+    def claim(self, limit, lease_seconds):
+        """Pobiera partię leadów do wysyłki i blokuje je na czas dzierżawy."""
+        now = time.time()
+        with self.db as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = conn.execute(
+                    'SELECT id, idempotency_key, payload, attempts FROM leads '
+                    'WHERE delivered_at IS NULL AND failed_at IS NULL AND next_attempt_at <= ? AND lease_until <= ? '
+                    'ORDER BY id LIMIT ?',
+                    (now, now, limit)
+                ).fetchall()
+                if rows:
+                    conn.executemany(
+                        'UPDATE leads SET lease_until = ? WHERE id = ?',
+                        [(now + lease_seconds, row[0]) for row in rows]
+                    )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return [
+            {'id': row[0], 'idempotency_key': row[1], 'payload': json.loads(row[2]), 'attempts': row[3]}
+            for row in rows
+        ]
+
+    def mark_delivered(self, ids):
+        # RODO: po dostarczeniu nie przechowujemy danych osobowych - zostaje tylko klucz idempotencji
+        with self.db as conn:
+            conn.executemany(
+                "UPDATE leads SET delivered_at = ?, payload = '{}', lease_until = 0, last_error = NULL WHERE id = ?",
+                [(time.time(), lead_id) for lead_id in ids]
+            )
+
+    def mark_failed(self, leads, error, retry_delay, max_attempts):
+        now = time.time()
+        for lead in leads:
+            attempts = lead['attempts'] + 1
+            if attempts >= max_attempts:
+                with self.db as conn:
+                    conn.execute(
+                        'UPDATE leads SET attempts = ?, failed_at = ?, lease_until = 0, last_error = ? WHERE id = ?',
+                        (attempts, now, error, lead['id'])
+                    )
+                logger.error(f"LEAD DELIVERY ABANDONED | Lead: {lead['id']} | Próby: {attempts} | Błąd: {error}")
+            else:
+                with self.db as conn:
+                    conn.execute(
+                        'UPDATE leads SET attempts = ?, next_attempt_at = ?, lease_until = 0, last_error = ? WHERE id = ?',
+                        (attempts, now + retry_delay(attempts), error, lead['id'])
+                    )
+
+    def stats(self):
+        with self.db as conn:
+            row = conn.execute(
+                'SELECT '
+                ' SUM(delivered_at IS NULL AND failed_at IS NULL),'
+                ' SUM(delivered_at IS NOT NULL),'
+                ' SUM(failed_at IS NOT NULL) '
+                'FROM leads'
+            ).fetchone()
+        return {'pending': row[0] or 0, 'delivered': row[1] or 0, 'failed': row[2] or 0}
+
+
+class LeadDeliveryWorker:
+    """
+    Wątek w tle wysyłający leady partiami do endpointu HTTP.
+    Przy batch_size == 1 wysyła pojedynczy obiekt leada (format dotychczasowej wtyczki WP),
+    przy większych partiach obiekt {"leads": [...]}. Każdy lead ma własny idempotency_key.
+    """
+
+    def __init__(self, queue, sink_url, sink_token=None, batch_size=1, poll_interval=5.0,
+                 lease_seconds=60.0, max_attempts=20, timeout=10.0):
+        self.queue = queue
+        self.sink_url = sink_url
+        self.sink_token = sink_token
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def start(self):
+        # Po forku gunicorna wątek trzeba uruchomić ponownie w każdym workerze
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='lead-delivery', daemon=True)
+        self._thread.start()
+
+    def notify(self):
+        """Budzi wątek po dodaniu nowego leada (bez czekania na kolejny cykl)."""
+        self._wakeup.set()
+
+    @staticmethod
+    def retry_delay(attempts):
+        # 10 s, 20 s, 40 s ... maksymalnie 30 minut między próbami
+        return min(10 * 2 ** (attempts - 1), 1800)
+
+    def _run(self):
+        while True:
+            try:
+                delivered = self.deliver_pending()
+            except Exception as e:
+                logger.error(f"LEAD WORKER FAIL | Błąd: {type(e).__name__} - {e}")
+                delivered = 0
+            if not delivered:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def deliver_pending(self):
+        """Wysyła jedną partię leadów. Zwraca liczbę dostarczonych."""
+        leads = self.queue.claim(self.batch_size, self.lease_seconds)
+        if not leads:
+            return 0
+        try:
+            self._send(leads)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            logger.warning(f"LEAD DELIVERY RETRY | Liczba: {len(leads)} | Błąd: {error}")
+            self.queue.mark_failed(leads, error, self.retry_delay, self.max_attempts)
+            return 0
+        self.queue.mark_delivered([lead['id'] for lead in leads])
+        logger.info(f"LEAD DELIVERED | Liczba: {len(leads)}")
+        return len(leads)
+
+    def _send(self, leads):
+        bodies = [dict(lead['payload'], idempotency_key=lead['idempotency_key']) for lead in leads]
+        if self.batch_size == 1:
+            body = bodies[0]
+            key = leads[0]['idempotency_key']
+        else:
+            body = {'leads': bodies}
+            key = hashlib.sha256('|'.join(lead['idempotency_key'] for lead in leads).encode('utf-8')).hexdigest()
+
+        headers = {'Content-Type': 'application/json', 'Idempotency-Key': key}
+        if self.sink_token:
+            headers['Authorization'] = f"Bearer {self.sink_token}"
+        request = urllib.request.Request(
+            self.sink_url,
+            data=json.dumps(body, ensure_ascii=False).encode('utf-8'),
+            headers=headers,
+            method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            if response.status >= 300:
+                raise urllib.error.HTTPError(self.sink_url, response.status, 'Nieoczekiwany status', response.headers, None)
+
+
+# Endpoint wtyczki WordPress, do którego wcześniej wysyłał leady widżet (adres bezwzględny)
+DEFAULT_LEAD_SINK_URL = "https://matyladesign.pl/wp-json/matyla/v1/save-lead"
+
+
+def create_lead_pipeline():
+    """
+    Tworzy kolejkę leadów i wątek wysyłki do LEAD_SINK_URL (domyślnie endpoint WordPressa).
+    Pusty LEAD_SINK_URL wyłącza wysyłkę - leady są wtedy tylko zapisywane w kolejce.
+    """
+    queue = LeadQueue(os.getenv('LEAD_QUEUE_PATH', 'leads.db'))
+    sink_url = os.getenv('LEAD_SINK_URL', DEFAULT_LEAD_SINK_URL).strip()
+    if not sink_url:
+        logger.warning("LEAD_SINK_URL jest pusty - leady będą tylko zapisywane w kolejce.")
+        return queue, None
+    worker = LeadDeliveryWorker(
+        queue,
+        sink_url,
+        sink_token=os.getenv('LEAD_SINK_TOKEN') or None,
+        batch_size=int(os.getenv('LEAD_SINK_BATCH_SIZE', 1)),
+        poll_interval=float(os.getenv('LEAD_POLL_INTERVAL_SECONDS', 5)),
+        max_attempts=int(os.getenv('LEAD_MAX_ATTEMPTS', 20)),
+    )
+    return queue, worker
@@ -0,0 +1,188 @@
+# --- Logowanie Strukturalne (kolejka + rotacja) ---
+# Wątek obsługujący zapytanie tylko wkłada rekord do kolejki w pamięci - zapis na dysk
+# wykonuje osobny wątek systemowy (LogWriter). Pod workerem gevent moduły threading i queue
+# są podmienione na wersje oparte o greenlety, dlatego wątek i kolejka pochodzą z oryginalnej
+# biblioteki standardowej - zapis pliku nie zajmuje pętli zdarzeń workera.
+# Rekordy są zapisywane jako JSON (jedna linia na zdarzenie) z identyfikatorem zapytania,
+# sesji i czasami obsługi. Plik jest rotowany według rozmiaru lub czasu; przy wielu
+# workerach każdy pisze do własnego pliku (LOG_FILE z '{pid}'), więc rotacja nie koliduje
+# między procesami.
+#
+# RODO: formatter zapisuje WYŁĄCZNIE pola z listy LOGGED_FIELDS. Treść wiadomości,
+# odpowiedzi AI ani dane z formularza nigdy nie trafiają do logu - nawet jeśli ktoś
+# przekaże je w 'extra'.
+import atexit
+import importlib
+import json
+import logging
+import logging.handlers
+import os
+import random
+import zlib
+from datetime import datetime, timezone
+
+try:
+    from flask import g, has_request_context
+except ImportError:  # logowanie poza aplikacją Flask (np. skrypty)
+    g = None
+
+    def has_request_context():
+        return False
+
+# Pola dodatkowe (logger.info(..., extra={...})), które mogą trafić do logu
+LOGGED_FIELDS = ('request_id', 'session', 'timings', 'tokens', 'source')
+
+
+def original(module, name):
+    """Obiekt z biblioteki standardowej sprzed ewentualnego gevent.monkey.patch_all()."""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return getattr(importlib.import_module(module), name)
+    return monkey.get_original(module, name)
+
+
+class RequestContextFilter(logging.Filter):
+    """Dokleja do rekordu identyfikator zapytania i sesji z flask.g (jeśli nie podano ich w 'extra')."""
+
+    def filter(self, record):
+        if has_request_context():
+            if getattr(record, 'request_id', None) is None:
+                record.request_id = g.get('request_id')
+            if getattr(record, 'session', None) is None:
+                record.session = g.get('session')
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Próbkowanie rekordów INFO oznaczonych 'sample': True (linie wysokiego wolumenu).
+    Decyzja zależy od identyfikatora zapytania, więc wybrane zapytanie ma w logu komplet linii.
+    Ostrzeżenia i błędy nie są nigdy próbkowane.
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if self.rate >= 1 or record.levelno > logging.INFO or not getattr(record, 'sample', False):
+            return True
+        request_id = getattr(record, 'request_id', None)
+        if request_id:
+            return zlib.crc32(request_id.encode('utf-8')) % 10000 < self.rate * 10000
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Jedna linia JSON na rekord, tylko z dozwolonych pól."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for field in LOGGED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler, który przy pełnej kolejce odrzuca rekord zamiast blokować zapytanie."""
+
+    def __init__(self, log_queue, maxsize=0):
+        super().__init__(log_queue)
+        self.maxsize = maxsize
+        self.dropped = 0
+
+    def enqueue(self, record):
+        if self.maxsize and self.queue.qsize() >= self.maxsize:
+            self.dropped += 1
+            return
+        self.queue.put_nowait(record)
+
+
+class LogWriter:
+    """
+    Zapis rekordów z kolejki do handlerów w osobnym wątku systemowym (odpowiednik QueueListener).
+    Kolejka musi być oryginalną queue.SimpleQueue - wątek blokuje się na niej bez udziału gevent.
+    """
+
+    _sentinel = None
+
+    def __init__(self, log_queue, *handlers):
+        self.queue = log_queue
+        self.handlers = handlers
+        self._done = None
+
+    def start(self):
+        self._done = original('_thread', 'allocate_lock')()
+        self._done.acquire()
+        original('_thread', 'start_new_thread')(self._run, ())
+
+    def _run(self):
+        try:
+            while True:
+                record = self.queue.get()
+                if record is self._sentinel:
+                    break
+                for handler in self.handlers:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+        finally:
+            for handler in self.handlers:
+                handler.flush()
+            self._done.release()
+
+    def stop(self, timeout=5.0):
+        """Zapisuje rekordy pozostałe w kolejce i kończy wątek."""
+        if self._done is None:
+            return
+        self.queue.put(self._sentinel)
+        self._done.acquire(timeout=timeout)
+        self._done = None
+
+
+def build_file_handler(path):
+    """Handler pliku z rotacją: czasową (LOG_ROTATE_WHEN, np. 'midnight') lub według rozmiaru."""
+    backup_count = int(os.getenv('LOG_BACKUP_COUNT', 7))
+    when = os.getenv('LOG_ROTATE_WHEN', '').strip()
+    if when:
+        return logging.handlers.TimedRotatingFileHandler(path, when=when, backupCount=backup_count,
+                                                         encoding='utf-8', utc=True)
+    return logging.handlers.RotatingFileHandler(path, maxBytes=int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024)),
+                                                backupCount=backup_count, encoding='utf-8')
+
+
+def setup_logging():
+    """
+    Konfiguruje logger główny: kolejka w pamięci -> wątek zapisu -> plik JSON z rotacją.
+    Zwraca handler kolejki (licznik odrzuconych rekordów: handler.dropped, wątek zapisu: handler.writer).
+    """
+    path = os.getenv('LOG_FILE', 'app.log').format(pid=os.getpid())
+    file_handler = build_file_handler(path)
+    file_handler.setFormatter(JsonFormatter())
+
+    log_queue = original('queue', 'SimpleQueue')()
+    queue_handler = NonBlockingQueueHandler(log_queue, maxsize=int(os.getenv('LOG_QUEUE_SIZE', 10000)))
+    queue_handler.addFilter(RequestContextFilter())
+    queue_handler.addFilter(SamplingFilter(float(os.getenv('LOG_INFO_SAMPLE_RATE', 1.0))))
+
+    root = logging.getLogger()
+    root.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    writer = LogWriter(log_queue, file_handler)
+    writer.start()
+    # Przy zamykaniu procesu zapisujemy rekordy pozostałe w kolejce
+    atexit.register(writer.stop)
+    queue_handler.writer = writer
+    return queue_handler
@@ -0,0 +1,144 @@
+# --- Metryki (format tekstowy Prometheusa) ---
+# Lekka instrumentacja bez zewnętrznych zależności: liczniki i histogramy w pamięci
+# procesu, aktualizowane pod krótką blokadą (bez I/O na ścieżce zapytania).
+# Wartości pochodzące z innych komponentów (cache, sesje, upstream) są odczytywane
+# dopiero w momencie pobrania /metrics. Metryki są per proces - każdy worker gunicorna
+# raportuje własne wartości (etykieta 'worker' = PID).
+import bisect
+import os
+import threading
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+FAST_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def render(self, extra_labels):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{format_labels(key + extra_labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}  # etykiety -> [liczniki kubełków..., suma, liczba]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self, extra_labels):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{format_labels(key + extra_labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{format_labels(key + extra_labels + (('le', '+Inf'),))} {series[-1]}")
+            lines.append(f"{self.name}_sum{format_labels(key + extra_labels)} {series[-2]}")
+            lines.append(f"{self.name}_count{format_labels(key + extra_labels)} {series[-1]}")
+        return lines
+
+
+class Registry:
+    """Zbiór metryk oraz funkcji odczytujących wartości z innych komponentów przy pobraniu."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help_text):
+        metric = Counter(name, help_text)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help_text, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, function):
+        """
+        Rejestruje funkcję zwracającą listę (nazwa, typ, opis, [(etykiety, wartość), ...]).
+        Wywoływana tylko przy pobraniu /metrics.
+        """
+        self._collectors.append(function)
+        return function
+
+    def render(self):
+        extra_labels = (("worker", os.getpid()),)
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render(extra_labels))
+        for function in self._collectors:
+            for name, kind, help_text, samples in function():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{format_labels(tuple(labels) + extra_labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# --- Metryki ścieżki /chat ---
+REQUEST_DURATION = registry.histogram(
+    "chat_request_duration_seconds", "Całkowity czas obsługi zapytania /chat")
+UPSTREAM_DURATION = registry.histogram(
+    "chat_upstream_duration_seconds", "Czas oczekiwania na OpenAI (z ponowieniami; dla strumienia do ostatniego tokenu)")
+TIME_TO_FIRST_TOKEN = registry.histogram(
+    "chat_time_to_first_token_seconds", "Czas od przyjęcia zapytania do wysłania pierwszego fragmentu odpowiedzi")
+SERIALIZATION_DURATION = registry.histogram(
+    "chat_serialization_duration_seconds", "Czas serializacji odpowiedzi (JSON / zdarzenia SSE)", FAST_BUCKETS)
+PROMPT_TOKENS = registry.counter(
+    "chat_prompt_tokens_total", "Tokeny wejściowe zużyte w OpenAI (completion.usage)")
+COMPLETION_TOKENS = registry.counter(
+    "chat_completion_tokens_total", "Tokeny wyjściowe zużyte w OpenAI (completion.usage)")
+RESPONSES = registry.counter(
+    "chat_responses_total", "Odpowiedzi /chat według źródła (model, cache, fastpath) i wyniku")
+FASTPATH_REPLIES = registry.counter(
+    "chat_fastpath_replies_total", "Odpowiedzi skryptowe bez zapytania do OpenAI według reguły promptu")
+RATE_LIMITED = registry.counter(
+    "chat_rate_limited_total", "Odpowiedzi 429 według źródła (limiter aplikacji, upstream OpenAI)")
+
+
+def record_usage(usage):
+    """Zlicza tokeny z completion.usage (jeśli dostawca je zwrócił)."""
+    if usage is None:
+        return
+    PROMPT_TOKENS.inc(getattr(usage, "prompt_tokens", 0) or 0)
+    COMPLETION_TOKENS.inc(getattr(usage, "completion_tokens", 0) or 0)
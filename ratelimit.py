@@ -0,0 +1,227 @@
+# --- Współdzielone Limity (SQLite, bez usług zewnętrznych) ---
+# Liczniki w jednym pliku SQLite (tryb WAL), wspólne dla wszystkich workerów gunicorna
+# na hoście i zachowywane po restarcie:
+# * backend 'sqlite://' dla flask-limiter - limit "15 per minute; 100 per day" obowiązuje
+#   łącznie, a nie osobno w każdym workerze,
+# * budżety tokenów per IP i per sesja (liczone z completion.usage),
+# * globalny limit tokenów na minutę dla OpenAI (governor): zapytanie czeka na kolejne
+#   okno albo dostaje 503, zanim OpenAI zacznie zwracać 429.
+import os
+import sqlite3
+import threading
+import time
+
+from limits.storage import Storage
+
+from db import SharedConnection
+
+
+class CounterStore:
+    """Liczniki z oknem czasowym (fixed window) w SQLite."""
+
+    def __init__(self, path):
+        self.path = path
+        self.db = SharedConnection(path)
+        self._last_purge = time.time()
+        with self.db as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS counters ('
+                ' key TEXT PRIMARY KEY,'
+                ' value INTEGER NOT NULL,'
+                ' expires_at REAL NOT NULL)'
+            )
+
+    def incr(self, key, expiry, amount=1):
+        """Zwiększa licznik (po wygaśnięciu okna zaczyna od zera). Zwraca nową wartość."""
+        now = time.time()
+        with self.db as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute(
+                    'INSERT INTO counters (key, value, expires_at) VALUES (?, ?, ?) '
+                    'ON CONFLICT(key) DO UPDATE SET '
+                    ' value = CASE WHEN expires_at <= ? THEN excluded.value ELSE value + excluded.value END,'
+                    ' expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END',
+                    (key, amount, now + expiry, now, now)
+                )
+                value = conn.execute('SELECT value FROM counters WHERE key = ?', (key,)).fetchone()[0]
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        self._maybe_purge()
+        return value
+
+    def get(self, key):
+        with self.db as conn:
+            row = conn.execute(
+                'SELECT value FROM counters WHERE key = ? AND expires_at > ?', (key, time.time())
+            ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        with self.db as conn:
+            row = conn.execute(
+                'SELECT expires_at FROM counters WHERE key = ? AND expires_at > ?', (key, time.time())
+            ).fetchone()
+        return row[0] if row else time.time()
+
+    def clear(self, key):
+        with self.db as conn:
+            conn.execute('DELETE FROM counters WHERE key = ?', (key,))
+
+    def reset(self):
+        with self.db as conn:
+            return conn.execute('DELETE FROM counters').rowcount
+
+    def _maybe_purge(self):
+        # Sprzątanie wygasłych liczników co najwyżej raz na minutę
+        if time.time() - self._last_purge < 60:
+            return
+        self._last_purge = time.time()
+        with self.db as conn:
+            conn.execute('DELETE FROM counters WHERE expires_at <= ?', (time.time(),))
+
+
+# Wspólne instancje per ścieżka - limiter i budżety tokenów korzystają z tego samego pliku
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_counter_store(path):
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = CounterStore(path)
+        return store
+
+
+class SQLiteLimiterStorage(Storage):
+    """
+    Backend flask-limiter / limits dla adresów 'sqlite://<ścieżka>' (np. sqlite://ratelimit.db,
+    sqlite:////var/data/ratelimit.db). Obsługuje strategię fixed-window (domyślną).
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.store = get_counter_store(uri[len("sqlite://"):] or "ratelimit.db")
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def incr(self, key, expiry, amount=1):
+        return self.store.incr(key, expiry, amount)
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def get_expiry(self, key):
+        return self.store.get_expiry(key)
+
+    def check(self):
+        self.store.get("health")
+        return True
+
+    def reset(self):
+        return self.store.reset()
+
+    def clear(self, key):
+        self.store.clear(key)
+
+
+class TokenBudgets:
+    """
+    Budżety tokenów OpenAI per IP i per sesja (okno stałe, domyślnie doba).
+    Zapytanie jest sprawdzane przed wywołaniem modelu, a obciążane faktycznym zużyciem po nim.
+    Limit 0 wyłącza dany budżet.
+    """
+
+    def __init__(self, store, ip_limit=0, session_limit=0, window=86400):
+        self.store = store
+        self.ip_limit = ip_limit
+        self.session_limit = session_limit
+        self.window = window
+
+    def exceeded(self, client_ip, session_id):
+        """Zwraca 'ip' lub 'session', jeśli budżet jest wyczerpany, w przeciwnym razie None."""
+        if self.ip_limit and self.store.get(f"tokens/ip/{client_ip}") >= self.ip_limit:
+            return 'ip'
+        if self.session_limit and self.store.get(f"tokens/session/{session_id}") >= self.session_limit:
+            return 'session'
+        return None
+
+    def charge(self, client_ip, session_id, tokens):
+        if not tokens:
+            return
+        if self.ip_limit:
+            self.store.incr(f"tokens/ip/{client_ip}", self.window, tokens)
+        if self.session_limit:
+            self.store.incr(f"tokens/session/{session_id}", self.window, tokens)
+
+
+class TokenGovernor:
+    """
+    Globalny limit tokenów na minutę dla wszystkich workerów (poniżej limitu TPM konta OpenAI).
+    acquire() rezerwuje szacowaną liczbę tokenów w bieżącej minucie; gdy brak miejsca, czeka
+    na kolejną minutę (maksymalnie max_wait sekund) albo odrzuca zapytanie.
+    settle() koryguje rezerwację o faktyczne zużycie z completion.usage.
+    """
+
+    def __init__(self, store, tokens_per_minute=0, max_wait=5.0):
+        self.store = store
+        self.tokens_per_minute = tokens_per_minute
+        self.max_wait = max_wait
+        self.queued = 0
+        self.shed = 0
+
+    @staticmethod
+    def _key():
+        return f"tpm/{int(time.time() // 60)}"
+
+    def acquire(self, estimate):
+        """Zwraca True, gdy można wysłać zapytanie; False - zapytanie należy odrzucić."""
+        if not self.tokens_per_minute:
+            return True
+        give_up_at = time.monotonic() + self.max_wait
+        waited = False
+        while True:
+            key = self._key()
+            if self.store.incr(key, 120, estimate) <= self.tokens_per_minute:
+                return True
+            self.store.incr(key, 120, -estimate)
+            wait = 60 - time.time() % 60 + 0.05
+            if time.monotonic() + wait > give_up_at:
+                self.shed += 1
+                return False
+            if not waited:
+                waited = True
+                self.queued += 1
+            time.sleep(wait)
+
+    def settle(self, estimate, actual):
+        if self.tokens_per_minute and actual != estimate:
+            self.store.incr(self._key(), 120, actual - estimate)
+
+    def stats(self):
+        used = self.store.get(self._key()) if self.tokens_per_minute else 0
+        return {'tokens_per_minute': self.tokens_per_minute, 'used': used, 'queued': self.queued, 'shed': self.shed}
+
+
+def create_token_limits():
+    """Tworzy budżety tokenów i governor TPM na podstawie zmiennych środowiskowych."""
+    store = get_counter_store(os.getenv('RATE_LIMIT_DB_PATH', 'ratelimit.db'))
+    budgets = TokenBudgets(
+        store,
+        ip_limit=int(os.getenv('TOKEN_BUDGET_PER_IP', 400000)),
+        session_limit=int(os.getenv('TOKEN_BUDGET_PER_SESSION', 150000)),
+        window=int(os.getenv('TOKEN_BUDGET_WINDOW_SECONDS', 86400)),
+    )
+    governor = TokenGovernor(
+        store,
+        tokens_per_minute=int(os.getenv('OPENAI_TOKENS_PER_MINUTE', 150000)),
+        max_wait=float(os.getenv('TOKEN_GOVERNOR_MAX_WAIT', 15)),
+    )
+    return budgets, governor
@@ -0,0 +1,240 @@
+# --- Magazyn Sesji Rozmów (per odwiedzający) ---
+# Każdy odwiedzający dostaje własny identyfikator sesji, a jego historia rozmowy
+# jest przechowywana osobno. Warstwa lokalna to LRU w pamięci procesu z wygasaniem
+# po czasie bezczynności (TTL) i twardym limitem pamięci. Backend współdzielony
+# (SQLite w trybie WAL, domyślnie plik sessions.db) pozwala kontynuować rozmowę, gdy
+# kolejne zapytanie trafi do innego workera gunicorna.
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from db import SharedConnection
+
+# Format identyfikatora sesji wydawanego przez serwer (secrets.token_urlsafe)
+SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{20,64}$')
+
+# Przybliżony narzut pamięci na sesję i na wiadomość (słowniki, listy, klucze)
+SESSION_OVERHEAD_BYTES = 512
+MESSAGE_OVERHEAD_BYTES = 120
+
+
+class Session:
+    """
+    Stan rozmowy jednego odwiedzającego.
+    Historia NIE zawiera system promptu - jest on doklejany przy każdym zapytaniu do OpenAI.
+    'summary' to podsumowanie pierwszych 'summarized' wiadomości historii (patrz context.py).
+    'transcript_token' uprawnia do pobrania transkryptu - wydawany dopiero przy formularzu zgody.
+    """
+
+    def __init__(self, session_id, history=None, revision=0, updated_at=None, summary="", summarized=0,
+                 transcript_token=None):
+        self.id = session_id
+        self.history = history if history is not None else []
+        self.revision = revision
+        self.updated_at = updated_at if updated_at is not None else time.time()
+        self.summary = summary
+        self.summarized = summarized
+        self.transcript_token = transcript_token
+
+    def to_dict(self):
+        return {
+            'history': self.history,
+            'revision': self.revision,
+            'summary': self.summary,
+            'summarized': self.summarized,
+            'transcript_token': self.transcript_token,
+        }
+
+    @classmethod
+    def from_dict(cls, session_id, data, updated_at=None):
+        return cls(
+            session_id,
+            history=data.get('history', []),
+            revision=data.get('revision', 0),
+            updated_at=updated_at,
+            summary=data.get('summary', ''),
+            summarized=data.get('summarized', 0),
+            transcript_token=data.get('transcript_token'),
+        )
+
+    def approx_size(self):
+        """Szacunkowy rozmiar sesji w pamięci (w bajtach)."""
+        size = SESSION_OVERHEAD_BYTES + len(self.summary.encode('utf-8'))
+        for message in self.history:
+            size += MESSAGE_OVERHEAD_BYTES + len(message.get('content', '').encode('utf-8'))
+        return size
+
+
+class SQLiteSessionBackend:
+    """
+    Współdzielony backend sesji oparty o SQLite (tryb WAL).
+    Wystarczający dla wielu workerów na jednym hoście - bez zewnętrznych usług.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.db = SharedConnection(path)
+        with self.db as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS sessions ('
+                ' id TEXT PRIMARY KEY,'
+                ' data TEXT NOT NULL,'
+                ' updated_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions(updated_at)')
+
+    def load(self, session_id, ttl):
+        with self.db as conn:
+            row = conn.execute(
+                'SELECT data, updated_at FROM sessions WHERE id = ? AND updated_at >= ?',
+                (session_id, time.time() - ttl)
+            ).fetchone()
+        if row is None:
+            return None
+        return Session.from_dict(session_id, json.loads(row[0]), updated_at=row[1])
+
+    def save(self, session):
+        data = json.dumps(session.to_dict(), ensure_ascii=False)
+        with self.db as conn:
+            conn.execute(
+                'INSERT INTO sessions (id, data, updated_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at',
+                (session.id, data, session.updated_at)
+            )
+
+    def delete(self, session_id):
+        with self.db as conn:
+            conn.execute('DELETE FROM sessions WHERE id = ?', (session_id,))
+
+    def purge_expired(self, ttl):
+        with self.db as conn:
+            return conn.execute('DELETE FROM sessions WHERE updated_at < ?', (time.time() - ttl,)).rowcount
+
+
+class SessionStore:
+    """
+    LRU sesji w pamięci procesu z TTL bezczynności i limitem pamięci.
+    Gdy skonfigurowany jest backend współdzielony, jest on źródłem prawdy,
+    a LRU służy jedynie jako ograniczona pamięć podręczna.
+    """
+
+    def __init__(self, ttl=1800, max_sessions=5000, max_bytes=64 * 1024 * 1024, backend=None):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.backend = backend
+        self._sessions = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._last_purge = time.time()
+
+    # --- Operacje na lokalnym LRU (wywoływane pod blokadą) ---
+    def _drop(self, session_id):
+        self._sessions.pop(session_id, None)
+        self._total_bytes -= self._sizes.pop(session_id, 0)
+
+    def _put(self, session):
+        self._drop(session.id)
+        size = session.approx_size()
+        self._sessions[session.id] = session
+        self._sizes[session.id] = size
+        self._total_bytes += size
+        self._evict()
+
+    def _evict(self):
+        now = time.time()
+        # 1. Wygasłe sesje (najstarsze są na początku OrderedDict)
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.updated_at < self.ttl:
+                break
+            self._drop(oldest.id)
+        # 2. Twardy limit liczby sesji i pamięci - usuwamy najdawniej używane
+        while self._sessions and (len(self._sessions) > self.max_sessions or self._total_bytes > self.max_bytes):
+            self._drop(next(iter(self._sessions)))
+
+    # --- API publiczne ---
+    def new_session(self):
+        return Session(secrets.token_urlsafe(24))
+
+    def get(self, session_id):
+        """Zwraca aktywną sesję lub None (nieznany/wygasły/nieprawidłowy identyfikator)."""
+        if not isinstance(session_id, str) or not SESSION_ID_PATTERN.match(session_id):
+            return None
+
+        if self.backend is not None:
+            session = self.backend.load(session_id, self.ttl)
+            with self._lock:
+                if session is None:
+                    self._drop(session_id)
+                else:
+                    self._put(session)
+            return session
+
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if time.time() - session.updated_at >= self.ttl:
+                self._drop(session_id)
+                return None
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def get_or_create(self, session_id):
+        session = self.get(session_id)
+        if session is None:
+            session = self.new_session()
+        return session
+
+    def save(self, session):
+        """Zapisuje sesję po zakończonej turze (ostatni zapis wygrywa)."""
+        session.revision += 1
+        session.updated_at = time.time()
+        if self.backend is not None:
+            self.backend.save(session)
+        with self._lock:
+            self._put(session)
+        self._maybe_purge_backend()
+
+    def delete(self, session_id):
+        if self.backend is not None:
+            self.backend.delete(session_id)
+        with self._lock:
+            self._drop(session_id)
+
+    def _maybe_purge_backend(self):
+        # Sprzątanie współdzielonego backendu co najwyżej raz na minutę
+        if self.backend is None or time.time() - self._last_purge < 60:
+            return
+        self._last_purge = time.time()
+        self.backend.purge_expired(self.ttl)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'bytes': self._total_bytes,
+                'backend': type(self.backend).__name__ if self.backend is not None else None,
+            }
+
+
+def create_session_store():
+    """
+    Tworzy magazyn sesji na podstawie zmiennych środowiskowych.
+    Domyślnie sesje są współdzielone przez plik SQLite (jak ratelimit.db i leads.db);
+    pusty SESSION_DB_PATH oznacza sesje tylko w pamięci procesu (wyłącznie dla jednego workera).
+    """
+    db_path = os.getenv('SESSION_DB_PATH', 'sessions.db').strip()
+    backend = SQLiteSessionBackend(db_path) if db_path else None
+    return SessionStore(
+        ttl=int(os.getenv('SESSION_TTL_SECONDS', 1800)),
+        max_sessions=int(os.getenv('SESSION_MAX_ENTRIES', 5000)),
+        max_bytes=int(os.getenv('SESSION_MAX_BYTES', 64 * 1024 * 1024)),
+        backend=backend,
+    )
@@ -0,0 +1,88 @@
+// MATYLA DESIGN ASSISTANT — loader widżetu
+// Renderuje wyłącznie bańkę czatu. Pełny widżet (JS + CSS) jest pobierany dopiero po pierwszym
+// kliknięciu bańki albo w czasie bezczynności przeglądarki. Nazwy plików z hashem treści
+// wstawia skrypt budujący (python assets.py), adres bazowy wynika z adresu samego loadera.
+(() => {
+    if (window.MatylaChatLoader) return;
+
+    const script = document.currentScript;
+    const base = script ? script.src.slice(0, script.src.lastIndexOf('/') + 1) : '/assets/';
+    const WIDGET_JS = base + '__WIDGET_JS__';
+    const WIDGET_CSS = base + '__WIDGET_CSS__';
+
+    // Minimalny styl bańki (pełny arkusz przychodzi razem z widżetem)
+    const BUBBLE_CSS = '.chat-bubble{position:fixed;right:max(20px,env(safe-area-inset-right));bottom:calc(20px + env(safe-area-inset-bottom));width:64px;height:64px;border-radius:50%;display:flex;align-items:center;justify-content:center;background:rgba(0,0,0,.9);color:#fff;font:800 22px "Inter",system-ui,-apple-system,Segoe UI,Roboto,Arial,sans-serif;cursor:pointer;user-select:none;z-index:2147483000;border:1px solid rgba(255,255,255,.06);box-shadow:0 0 24px rgba(242,86,35,.55),0 0 70px rgba(242,86,35,.25)}@media (max-width:520px){.chat-bubble{right:12px;bottom:calc(16px + env(safe-area-inset-bottom))}}';
+
+    let loading = null;
+    let widget = null;
+
+    function loadStyle(href) {
+        return new Promise((resolve, reject) => {
+            const link = document.createElement('link');
+            link.rel = 'stylesheet';
+            link.href = href;
+            link.onload = resolve;
+            link.onerror = reject;
+            document.head.appendChild(link);
+        });
+    }
+
+    function loadScript(src) {
+        return new Promise((resolve, reject) => {
+            const el = document.createElement('script');
+            el.src = src;
+            el.async = true;
+            el.onload = resolve;
+            el.onerror = reject;
+            document.head.appendChild(el);
+        });
+    }
+
+    function mount() {
+        const bubble = document.createElement('button');
+        bubble.className = 'chat-bubble';
+        bubble.setAttribute('aria-label', 'Otwórz czat');
+        bubble.textContent = 'M';
+
+        const style = document.createElement('style');
+        style.textContent = BUBBLE_CSS;
+        document.head.appendChild(style);
+        document.body.appendChild(bubble);
+
+        const load = () => {
+            if (!loading) {
+                loading = Promise.all([loadStyle(WIDGET_CSS), loadScript(WIDGET_JS)]).then(() => {
+                    // Widżet przejmuje bańkę (własna obsługa kliknięcia), loader się wycofuje
+                    bubble.removeEventListener('click', openOnClick);
+                    widget = window.MatylaChatWidget.init(bubble);
+                    return widget;
+                });
+                loading.catch(err => {
+                    console.error('Nie udało się wczytać widżetu czatu:', err);
+                    loading = null;
+                });
+            }
+            return loading;
+        };
+
+        function openOnClick() {
+            bubble.setAttribute('aria-busy', 'true');
+            load().then(w => { bubble.removeAttribute('aria-busy'); w.open(); });
+        }
+
+        bubble.addEventListener('click', openOnClick);
+
+        // Wczytanie w tle, gdy przeglądarka jest bezczynna (bez wpływu na pierwsze malowanie strony)
+        const idle = window.requestIdleCallback || (cb => setTimeout(cb, 3000));
+        const loadWhenIdle = () => idle(() => load(), { timeout: 10000 });
+        if (document.readyState === 'complete') loadWhenIdle();
+        else window.addEventListener('load', loadWhenIdle);
+    }
+
+    window.MatylaChatLoader = { version: 1 };
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', mount);
+    } else {
+        mount();
+    }
+})();
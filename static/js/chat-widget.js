@@ -1,13 +1,28 @@
 // MATYLA DESIGN ASSISTANT — premium widget (final, validated edition)
-document.addEventListener('DOMContentLoaded', () => {
+// Widżet jest zwykle doładowywany przez chat-loader.js (po kliknięciu bańki lub w czasie bezczynności)
+// i przejmuje bańkę wyrenderowaną przez loader. Dołączony bezpośrednio startuje sam po DOMContentLoaded.
+(() => {
+function initChatWidget(existingBubble) {
 
     // --- Ustawienia API ---
     // UWAGA: Zmieniono adres URL, aby wskazywał na wdrożony serwer Flask na Renderze
     const FLASK_API_CHAT_URL = 'https://matyla-chat.onrender.com/chat'; 
-    // UWAGA: Zmień to na endpoint swojej wtyczki WordPress (jeśli jest inny)
-    const WP_LEAD_ENDPOINT = '/wp-json/matyla/v1/save-lead'; 
+    // Lead (dane z formularza + transkrypt) zapisuje serwer i sam przekazuje go do wtyczki WordPress.
+    // Endpoint wtyczki konfiguruje się po stronie serwera (LEAD_SINK_URL).
+    const FLASK_API_LEAD_URL = 'https://matyla-chat.onrender.com/chat/lead';
 
-    const bubble = document.createElement('button');
+    // Identyfikator sesji wydawany przez serwer przy pierwszej odpowiedzi.
+    // Dzięki niemu historia rozmowy jest przechowywana osobno dla każdego odwiedzającego.
+    let sessionId = null;
+    // Token uprawniający do przekazania leada - serwer wydaje go razem z formularzem [CONSENT]
+    let transcriptToken = null;
+
+    const rememberSession = (data) => {
+        if (data.session_id) sessionId = data.session_id;
+        if (data.transcript_token) transcriptToken = data.transcript_token;
+    };
+
+    const bubble = existingBubble || document.createElement('button');
     bubble.className = 'chat-bubble';
     bubble.setAttribute('aria-label', 'Otwórz czat');
     bubble.textContent = 'M';
@@ -65,7 +80,7 @@ document.addEventListener('DOMContentLoaded', () => {
         </div>
     `;
 
-    document.body.appendChild(bubble);
+    if (!existingBubble) document.body.appendChild(bubble);
     document.body.appendChild(win);
 
     const closeBtn = win.querySelector('.chat-close');
@@ -101,6 +116,11 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    // Usuwamy tag [CONSENT] i towarzyszący mu tekst instrukcji dla formularza
+    function cleanBotText(rawText) {
+        return rawText.replace(/\[CONSENT\]/g, '').replace(/Formularz pozwoli Ci wpisać imię i nazwisko, adres e-mail oraz numer telefonu \(opcjonalnie\)\. Po jego wysłaniu dane trafią bezpośrednio do naszego zespołu\./g, '').trim();
+    }
+
     // --- Dodaj wiadomość (bot lub user) ---
     async function appendMessage(rawText, sender) {
         const isBot = sender === 'bot';
@@ -112,8 +132,7 @@ document.addEventListener('DOMContentLoaded', () => {
         msg.style.opacity = '0';
         msg.style.transition = 'opacity .45s ease';
 
-        // Usuwamy tag [CONSENT] i towarzyszący mu tekst instrukcji dla formularza
-        const cleanText = rawText.replace(/\[CONSENT\]/g, '').replace(/Formularz pozwoli Ci wpisać imię i nazwisko, adres e-mail oraz numer telefonu \(opcjonalnie\)\. Po jego wysłaniu dane trafią bezpośrednio do naszego zespołu\./g, '').trim();
+        const cleanText = cleanBotText(rawText);
 
 
         if (isBot) {
@@ -148,6 +167,73 @@ document.addEventListener('DOMContentLoaded', () => {
         return rawText; 
     }
 
+    const hideTyping = () => {
+        typingIndicatorRow.style.display = 'none';
+        if (msgs.contains(typingIndicatorRow)) msgs.removeChild(typingIndicatorRow);
+    };
+
+    // Ukrywamy standardowy input i pokazujemy formularz zgody
+    function showConsentForm() {
+        if (consentForm.style.display === 'flex') return;
+        chatInputArea.style.display = 'none'; 
+        consentForm.style.display = 'flex';   
+        
+        // Ustaw focus na pierwsze pole
+        setTimeout(() => { consentForm.querySelector('#consentName').focus(); }, 100); 
+    }
+
+    // --- Wiadomość bota renderowana na bieżąco, w miarę napływu tokenów ---
+    function createStreamingMessage() {
+        const row = document.createElement('div');
+        row.className = 'msg-row';
+        const av = document.createElement('div');
+        av.className = 'msg-avatar';
+        av.textContent = 'M';
+        const msg = document.createElement('div');
+        msg.className = 'msg bot';
+        row.appendChild(av);
+        row.appendChild(msg);
+        msgs.appendChild(row);
+
+        let rawText = '';
+        return {
+            append(delta) {
+                rawText += delta;
+                // podział na akapity (\n\n) - przebudowujemy tylko treść tej wiadomości
+                msg.replaceChildren(...cleanBotText(rawText).split(/\n\s*\n/).filter(p => p.trim()).map(part => {
+                    const p = document.createElement('p');
+                    p.textContent = part;
+                    return p;
+                }));
+                scrollToEnd();
+            }
+        };
+    }
+
+    // --- Odczyt strumienia SSE z /chat (zdarzenia: session, delta, consent, done, error) ---
+    async function readEventStream(res, onEvent) {
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            let sep;
+            while ((sep = buffer.indexOf('\n\n')) !== -1) {
+                const rawEvent = buffer.slice(0, sep);
+                buffer = buffer.slice(sep + 2);
+                let event = 'message';
+                let data = '';
+                for (const line of rawEvent.split('\n')) {
+                    if (line.startsWith('event:')) event = line.slice(6).trim();
+                    else if (line.startsWith('data:')) data += line.slice(5).trim();
+                }
+                if (data) onEvent(event, JSON.parse(data));
+            }
+        }
+    }
+
     // --- Główna funkcja wysyłania ---
     function send() {
         const userText = input.value.trim();
@@ -164,36 +250,51 @@ document.addEventListener('DOMContentLoaded', () => {
 
         fetch(FLASK_API_CHAT_URL, {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ message: userText })
+            headers: { 'Content-Type': 'application/json', 'Accept': 'text/event-stream' },
+            body: JSON.stringify({ message: userText, session_id: sessionId, stream: true })
         })
-        .then(res => res.json())
-        .then(async data => {
-            input.disabled = false; // Odblokuj input
-            typingIndicatorRow.style.display = 'none';
-            if (msgs.contains(typingIndicatorRow)) msgs.removeChild(typingIndicatorRow);
-            
-            const rawResponse = data.response || data.reply || "Brak odpowiedzi.";
-            
-            // Czekamy, aż wiadomość bota zostanie w pełni "napisana"
-            const writtenResponse = await appendMessage(rawResponse, 'bot'); 
-            scrollToEnd();
-            
-            // Logika WYKRYWANIA TAGU [CONSENT] i przełączania interfejsu
-            if (writtenResponse.includes('[CONSENT]')) {
-                // Ukrywamy standardowy input i pokazujemy formularz
-                chatInputArea.style.display = 'none'; 
-                consentForm.style.display = 'flex';   
-                
-                // Ustaw focus na pierwsze pole
-                setTimeout(() => { consentForm.querySelector('#consentName').focus(); }, 100); 
+        .then(async res => {
+            const contentType = res.headers.get('Content-Type') || '';
+
+            // Odpowiedź JSON (np. limit zapytań) - zachowanie jak dotychczas
+            if (!contentType.includes('text/event-stream')) {
+                const data = await res.json();
+                rememberSession(data);
+                input.disabled = false; // Odblokuj input
+                hideTyping();
+                const writtenResponse = await appendMessage(data.response || data.reply || "Brak odpowiedzi.", 'bot');
+                scrollToEnd();
+                if (writtenResponse.includes('[CONSENT]')) showConsentForm();
+                return;
             }
+
+            // Strumień: pierwsza porcja tekstu zastępuje typing indicator
+            let botMessage = null;
+            await readEventStream(res, (event, data) => {
+                if (event === 'session' || event === 'done') rememberSession(data);
+                if (event === 'message' && data.delta) {
+                    if (!botMessage) {
+                        hideTyping();
+                        botMessage = createStreamingMessage();
+                    }
+                    botMessage.append(data.delta);
+                }
+                // Logika WYKRYWANIA TAGU [CONSENT]: na bieżąco oraz w pełnym tekście na końcu
+                if (event === 'consent' || (event === 'done' && data.consent)) {
+                    showConsentForm();
+                }
+                if (event === 'error') {
+                    hideTyping();
+                    appendMessage(data.response || "Wystąpił błąd komunikacji. Spróbuj ponownie.", 'bot');
+                }
+            });
+            input.disabled = false; // Odblokuj input
+            hideTyping();
         })
         .catch(err => {
             input.disabled = false; // Odblokuj input po błędzie
             console.error('Błąd komunikacji z serwerem Flask:', err);
-            typingIndicatorRow.style.display = 'none';
-            if (msgs.contains(typingIndicatorRow)) msgs.removeChild(typingIndicatorRow);
+            hideTyping();
             appendMessage("Wystąpił błąd komunikacji. Spróbuj ponownie.", 'bot');
         });
     }
@@ -230,48 +331,37 @@ document.addEventListener('DOMContentLoaded', () => {
         typingIndicatorRow.style.display = 'flex';
         scrollToEnd();
         
-        // 1. Wysyłamy zebrane dane jako ostatnią wiadomość użytkownika do AI
-        fetch(FLASK_API_CHAT_URL, {
+        // 1. Przekazujemy lead serwerowi (trwała kolejka, wysyłka do WP w tle).
+        //    Serwer dołącza transkrypt rozmowy sam - historia nie wraca już do przeglądarki.
+        fetch(FLASK_API_LEAD_URL, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ message: summary })
+            body: JSON.stringify({
+                session_id: sessionId,
+                transcript_token: transcriptToken,
+                name: name,
+                email: email,
+                phone: phone,
+                consent: true
+            })
+        })
+        .then(res => {
+            if (!res.ok) throw new Error(`Zapis leada nieudany (${res.status})`);
+
+            // 2. Wysyłamy zebrane dane jako ostatnią wiadomość użytkownika do AI (wiadomość kończąca)
+            return fetch(FLASK_API_CHAT_URL, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ message: summary, session_id: sessionId })
+            });
         })
         .then(res => res.json())
         .then(async data => {
+            rememberSession(data);
             typingIndicatorRow.style.display = 'none';
             if (msgs.contains(typingIndicatorRow)) msgs.removeChild(typingIndicatorRow);
             
             const rawResponse = data.response || data.reply || "Dziękujemy za kontakt!";
-            const fullHistory = data.history; 
-
-            // 2. Wysyłamy pełne dane leada (z historią) do endpointu WordPress PHP
-            if (fullHistory) {
-                const leadData = {
-                    name: name,
-                    email: email,
-                    phone: phone || 'Brak',
-                    chat_history: fullHistory, 
-                    timestamp: new Date().toISOString()
-                };
-
-                fetch(WP_LEAD_ENDPOINT, { 
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify(leadData)
-                })
-                .then(wpRes => {
-                    if (!wpRes.ok) {
-                        console.error("Błąd zapisu leada do WP:", wpRes.statusText);
-                    } else {
-                        console.log("Dane leada pomyślnie wysłane do wtyczki WP.");
-                    }
-                })
-                .catch(wpErr => {
-                    console.error("Błąd komunikacji z endpointem WP:", wpErr);
-                });
-            } else {
-                console.warn("Brak historii konwersacji w odpowiedzi serwera Python. Wysyłanie do WP pominięte.");
-            }
 
             // 3. Wyświetlamy końcową wiadomość AI
             await appendMessage(rawResponse, 'bot');
@@ -290,4 +380,18 @@ document.addEventListener('DOMContentLoaded', () => {
             chatInputArea.style.display = 'flex'; 
         });
     });
-});
\ No newline at end of file
+
+    return { open };
+}
+
+window.MatylaChatWidget = { init: initChatWidget };
+
+// Bez loadera (bezpośrednie <script src=".../chat-widget.js">) - zachowanie jak dotychczas
+if (!window.MatylaChatLoader) {
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', () => initChatWidget());
+    } else {
+        initChatWidget();
+    }
+}
+})();
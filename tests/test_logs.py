@@ -0,0 +1,90 @@
+# RODO: treść rozmów i dane z formularza nie mogą trafić do logu (logs.LOGGED_FIELDS).
+import importlib
+import json
+import logging
+import sys
+import types
+
+import pytest
+
+from logs import JsonFormatter
+
+MESSAGE = "Jaka jest jutro pogoda? Piszę z adresu jan.kowalski@example.com, tel. 600 100 200"
+SECRETS = ("jan.kowalski", "600 100 200", "Jaka jest jutro pogoda", "Anna Nowak", "anna.nowak@example.com",
+           "501 502 503", "Potrzebuję strony dla kwiaciarni", "Odpowiedź modelu dla kwiaciarni")
+
+
+def make_record(msg, extra):
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, msg, (), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_formatter_writes_only_allowed_fields():
+    record = make_record("USER MESSAGE RECEIVED", {
+        'message': MESSAGE, 'email': "jan.kowalski@example.com", 'chat_history': [{'content': MESSAGE}],
+        'request_id': "abc123", 'tokens': 42,
+    })
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert set(entry) == {'ts', 'level', 'logger', 'msg', 'request_id', 'tokens'}
+    assert not any(secret in json.dumps(entry, ensure_ascii=False) for secret in SECRETS)
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name, value in {
+        'OPENAI_API_KEY': "sk-test",
+        'LOG_FILE': str(tmp_path / "app.log"),
+        'LOG_INFO_SAMPLE_RATE': "1",
+        'SESSION_DB_PATH': str(tmp_path / "sessions.db"),
+        'RATE_LIMIT_DB_PATH': str(tmp_path / "ratelimit.db"),
+        'LEAD_QUEUE_PATH': str(tmp_path / "leads.db"),
+        'LEAD_SINK_URL': "",
+    }.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.delenv('RATE_LIMIT_STORAGE_URI', raising=False)
+    sys.modules.pop('app', None)
+    module = importlib.import_module('app')
+    yield module
+    module.log_handler.writer.stop()
+    sys.modules.pop('app', None)
+
+
+def test_chat_and_lead_requests_do_not_log_content(app_module, tmp_path, monkeypatch):
+    usage = types.SimpleNamespace(prompt_tokens=100, completion_tokens=20, total_tokens=120)
+    completion = types.SimpleNamespace(
+        choices=[types.SimpleNamespace(message=types.SimpleNamespace(content="Odpowiedź modelu dla kwiaciarni"))],
+        usage=usage,
+    )
+    monkeypatch.setattr(app_module.openai_upstream, 'complete', lambda *args, **kwargs: (completion, 1, "gpt-test"))
+    client = app_module.app.test_client()
+
+    # Odpowiedź skryptowa (Zasada 13) i odpowiedź modelu
+    scripted = client.post('/chat', json={'message': MESSAGE}).get_json()
+    session_id = scripted['session_id']
+    assert client.post('/chat', json={'message': "Potrzebuję strony dla kwiaciarni",
+                                      'session_id': session_id}).status_code == 200
+
+    # Formularz zgody: dane osobowe trafiają tylko do kolejki leadów
+    session = app_module.session_store.get(session_id)
+    session.transcript_token = "token-testowy"
+    app_module.session_store.save(session)
+    response = client.post('/chat/lead', json={
+        'session_id': session_id, 'transcript_token': "token-testowy", 'consent': True,
+        'name': "Anna Nowak", 'email': "anna.nowak@example.com", 'phone': "501 502 503",
+    })
+    assert response.status_code == 202
+
+    logging.getLogger("test").info("RODO CHECK", extra={'user_message': MESSAGE, 'email': "anna.nowak@example.com"})
+    app_module.log_handler.writer.stop()
+
+    lines = (tmp_path / "app.log").read_text(encoding='utf-8').splitlines()
+    entries = [json.loads(line) for line in lines]
+    messages = [entry['msg'] for entry in entries]
+    assert any(msg.startswith("REQUEST SUCCESS") for msg in messages)
+    assert any(msg.startswith("LEAD QUEUED") for msg in messages)
+    assert "RODO CHECK" in messages
+    for line in lines:
+        assert not any(secret in line for secret in SECRETS), line
@@ -0,0 +1,38 @@
+# Circuit breaker: zapytanie próbne (half_open) nie może utknąć, gdy brakuje miejsca w limicie.
+import time
+import types
+
+import pytest
+
+from upstream import CircuitBreaker, Upstream, UpstreamBusy
+
+
+def make_upstream():
+    completion = types.SimpleNamespace(choices=[], usage=None)
+    client = types.SimpleNamespace(chat=types.SimpleNamespace(
+        completions=types.SimpleNamespace(create=lambda **kwargs: completion)
+    ))
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    return Upstream(client, "gpt-test", max_concurrency=1, queue_timeout=0.01, breaker=breaker), completion
+
+
+def test_busy_probe_does_not_leave_breaker_half_open():
+    upstream, completion = make_upstream()
+    upstream.breaker.record_failure()
+    time.sleep(0.02)
+
+    # Wszystkie miejsca zajęte: zapytanie próbne kończy się UpstreamBusy
+    upstream._slots.acquire()
+    with pytest.raises(UpstreamBusy):
+        upstream.complete([])
+    upstream._slots.release()
+
+    # Kolejne zapytanie może wykonać próbę i zamyka breaker
+    assert upstream.complete([])[0] is completion
+    assert upstream.breaker.stats()['state'] == 'closed'
+
+
+def test_stream_failure_opens_breaker():
+    upstream, _ = make_upstream()
+    upstream.stream_failed()
+    assert upstream.breaker.stats()['state'] == 'open'
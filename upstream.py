@@ -0,0 +1,264 @@
+# --- Warstwa Wywołań OpenAI (retry, limit czasu, circuit breaker) ---
+# Wspólne miejsce dla każdego zapytania do OpenAI:
+# * ponawianie z opóźnieniem "decorrelated jitter" i respektowaniem nagłówka Retry-After,
+# * łączny budżet czasu na zapytanie (deadline) - także dla pojedynczych prób,
+# * circuit breaker: w czasie awarii dostawcy od razu zwracamy komunikat zastępczy,
+#   zamiast dokładać kolejne zapytania,
+# * limit równoczesnych zapytań per proces (semafor),
+# * opcjonalny model zapasowy używany w ostatniej próbie.
+import email.utils
+import logging
+import random
+import threading
+import time
+
+from openai import APIConnectionError, APIStatusError, RateLimitError
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamError(Exception):
+    """Bazowy błąd warstwy upstream (mapowany w app.py na komunikat dla widżetu)."""
+
+
+class UpstreamBusy(UpstreamError):
+    """Brak wolnego miejsca na zapytanie do OpenAI w wyznaczonym czasie."""
+
+
+class UpstreamRateLimited(UpstreamError):
+    """OpenAI nadal zwraca 429 po wyczerpaniu prób."""
+
+
+class UpstreamUnavailable(UpstreamError):
+    """Dostawca niedostępny: otwarty circuit breaker, przekroczony deadline lub błędy 5xx."""
+
+
+class CircuitBreaker:
+    """
+    Klasyczny breaker: closed -> open (po N kolejnych błędach) -> half_open (po czasie
+    odnowienia przepuszcza jedno zapytanie próbne) -> closed (sukces) lub open (błąd).
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.open_count = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._probe_in_flight = False
+            if self.state == 'half_open' and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def cancel_probe(self):
+        """Zapytanie próbne zakończyło się błędem niezwiązanym z dostawcą - kolejne może spróbować."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    self.open_count += 1
+                    logger.warning(f"CIRCUIT OPEN | Kolejne błędy: {self.failures}")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            return {'state': self.state, 'failures': self.failures, 'open_count': self.open_count}
+
+
+def retry_after_seconds(error):
+    """Czas oczekiwania podany przez serwer (retry-after-ms / retry-after), jeśli jest."""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        value = headers.get('retry-after')
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            parsed = email.utils.parsedate_to_datetime(value)
+            return max(0.0, parsed.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error):
+    if isinstance(error, (RateLimitError, APIConnectionError)):
+        return True
+    return isinstance(error, APIStatusError) and (error.status_code in (408, 409) or error.status_code >= 500)
+
+
+class Upstream:
+    """Odporny klient chat.completions dla całej aplikacji."""
+
+    def __init__(self, client, model, fallback_model=None, max_attempts=3, base_delay=0.5, max_delay=8.0,
+                 deadline=30.0, max_concurrency=100, queue_timeout=10.0, breaker=None):
+        self.client = client
+        self.model = model
+        self.fallback_model = fallback_model
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.queue_timeout = queue_timeout
+        self.breaker = breaker or CircuitBreaker()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._stats_lock = threading.Lock()
+        self.counters = {
+            'calls': 0,
+            'retries': 0,
+            'rate_limited': 0,
+            'failures': 0,
+            'fallback_used': 0,
+            'short_circuited': 0,
+            'deadline_exceeded': 0,
+            'busy': 0,
+        }
+
+    def _count(self, name, value=1):
+        with self._stats_lock:
+            self.counters[name] += value
+
+    def _acquire_slot(self, deadline_at):
+        timeout = min(self.queue_timeout, max(0.0, deadline_at - time.monotonic()))
+        if not self._slots.acquire(timeout=timeout):
+            self._count('busy')
+            raise UpstreamBusy()
+
+    def _backoff(self, previous):
+        # Decorrelated jitter: losowo między bazą a trzykrotnością poprzedniego opóźnienia
+        return min(self.max_delay, random.uniform(self.base_delay, previous * 3))
+
+    def _call(self, messages, stream, label):
+        """
+        Wspólna pętla prób. Zwraca (wynik, numer próby, model).
+        Dla stream=True miejsce w limicie pozostaje zajęte - zwalnia je wywołujący (release()).
+        """
+        self._count('calls')
+        deadline_at = time.monotonic() + self.deadline
+        delay = self.base_delay
+        last_error = None
+
+        for attempt in range(1, self.max_attempts + 1):
+            if not self.breaker.allow():
+                self._count('short_circuited')
+                raise UpstreamUnavailable('circuit_open')
+
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                self._count('deadline_exceeded')
+                raise UpstreamUnavailable('deadline')
+
+            model = self.model
+            if self.fallback_model and attempt == self.max_attempts and attempt > 1:
+                model = self.fallback_model
+                self._count('fallback_used')
+
+            try:
+                self._acquire_slot(deadline_at)
+            except UpstreamBusy:
+                # Zapytanie próbne (half_open) nie dotarło do dostawcy - zwalniamy je dla kolejnego
+                self.breaker.cancel_probe()
+                raise
+            try:
+                remaining = max(0.1, deadline_at - time.monotonic())
+                kwargs = {'model': model, 'messages': messages, 'timeout': remaining}
+                if stream:
+                    kwargs.update(stream=True, stream_options={'include_usage': True})
+                result = self.client.chat.completions.create(**kwargs)
+            except Exception as e:
+                self._slots.release()
+                if not is_retryable(e):
+                    # Dostawca odpowiada (np. 400) - to nie jest awaria, breaker pozostaje zamknięty
+                    if isinstance(e, APIStatusError):
+                        self.breaker.record_success()
+                    else:
+                        self.breaker.cancel_probe()
+                    raise
+                last_error = e
+                self.breaker.record_failure()
+                self._count('failures')
+                if isinstance(e, RateLimitError):
+                    self._count('rate_limited')
+            else:
+                if not stream:
+                    self._slots.release()
+                self.breaker.record_success()
+                return result, attempt, model
+
+            logger.warning(f"RETRY REQUIRED | Błąd: {type(last_error).__name__} | Próba: {attempt}/{self.max_attempts}{label}")
+            if attempt == self.max_attempts:
+                break
+
+            delay = self._backoff(delay)
+            hint = retry_after_seconds(last_error)
+            wait = max(delay, hint) if hint is not None else delay
+            if time.monotonic() + wait >= deadline_at:
+                # Serwer każe czekać dłużej, niż pozwala budżet czasu - nie ma sensu czekać
+                self._count('deadline_exceeded')
+                break
+            self._count('retries')
+            time.sleep(wait)
+
+        logger.error(f"RETRY FAILED | Błąd: {type(last_error).__name__} | Po {attempt} próbach.{label}")
+        if isinstance(last_error, RateLimitError):
+            raise UpstreamRateLimited() from last_error
+        raise UpstreamUnavailable('exhausted') from last_error
+
+    def complete(self, messages, log_context=''):
+        """Zwykłe zapytanie. Zwraca (completion, numer próby, model)."""
+        return self._call(messages, stream=False, label=log_context)
+
+    def open_stream(self, messages, log_context=''):
+        """
+        Otwiera strumień tokenów. Zwraca (strumień, release, numer próby, model);
+        release() trzeba wywołać po zakończeniu lub przerwaniu strumienia.
+        """
+        upstream, attempt, model = self._call(messages, stream=True, label=f"{log_context} | Stream")
+        released = threading.Event()
+
+        def release():
+            if released.is_set():
+                return
+            released.set()
+            upstream.close()
+            self._slots.release()
+
+        return upstream, release, attempt, model
+
+    def stream_failed(self):
+        """Błąd w trakcie otwartego strumienia (zerwane połączenie, błąd dostawcy) - liczy się do breakera."""
+        self._count('failures')
+        self.breaker.record_failure()
+
+    def stats(self):
+        with self._stats_lock:
+            counters = dict(self.counters)
+        return dict(counters, breaker=self.breaker.stats())